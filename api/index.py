@@ -3,10 +3,24 @@ from fastapi.responses import JSONResponse
 import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
-from marketcompare.main import run
-import uvicorn
+from marketcompare.charts import enable_render_pool
+from marketcompare.mongo import close_clients
+from marketcompare.jobs import get_job_manager
+from marketcompare.routes import router
 
 app = FastAPI(title="Market Comparison API", version="1.0.0")
+app.include_router(router)
+
+@app.on_event("startup")
+def startup():
+    # Served by uvicorn, whose __main__ can safely be re-imported by chart workers
+    enable_render_pool()
+
+@app.on_event("shutdown")
+def shutdown():
+    # Stop accepting queued jobs and release the shared MongoDB connection pool
+    get_job_manager().shutdown()
+    close_clients()
 
 @app.get("/")
 def root():
@@ -14,7 +28,10 @@ def root():
 
 @app.get("/run/market")
 def run_market_crew():
+    # Blocking variant kept for existing clients; prefer POST /jobs
     try:
+        # Imported on first use: the crew, crewAI and the tools are heavy
+        from marketcompare.main import run
         report = run()
         return JSONResponse(content=report)
     except Exception as e:
@@ -25,4 +42,5 @@ def health_check():
     return {"status": "healthy"}
 
 if __name__ == "__main__":
+    import uvicorn
     uvicorn.run("index:app", host="0.0.0.0", port=8003, reload=True)
\ No newline at end of file
@@ -1,15 +1,30 @@
 # Option A: Use relative imports in api.py
 from fastapi import FastAPI
 from fastapi.responses import JSONResponse
-from .main import run
-import uvicorn
+from .charts import enable_render_pool
+from .mongo import close_clients
+from .jobs import get_job_manager
+from .routes import router
 
 app = FastAPI()
+app.include_router(router)
+
+@app.on_event("startup")
+def startup():
+    # Served by uvicorn, whose __main__ can safely be re-imported by chart workers
+    enable_render_pool()
+
+@app.on_event("shutdown")
+def shutdown():
+    get_job_manager().shutdown()
+    close_clients()
 
 @app.get("/run/market")
 def run_market_crew():
+    from .main import run
     report = run()
-    return JSONResponse(content=report.model_dump())
+    return JSONResponse(content=report)
 
 # if __name__ == "__main__":
+#     import uvicorn
 #     uvicorn.run("api:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -0,0 +1,88 @@
+"""GridFS store for report artifacts (PDFs and chart PNGs), deduplicated by content.
+
+Artifacts are written in chunks to the `report_artifacts` GridFS bucket
+with their SHA-256 in `metadata.sha256`; storing bytes that are already
+present returns the existing file id instead of a second copy. A unique
+index on the hash keeps concurrent writers of the same bytes to one copy. Report
+documents in `Market_Report` only keep the artifact ids, so they stay far
+below the 16 MB BSON document limit.
+"""
+import hashlib
+import io
+import threading
+
+from .mongo import get_database
+
+BUCKET_NAME = "report_artifacts"
+CHUNK_SIZE = 255 * 1024
+SHA256_INDEX = "metadata_sha256_unique"
+
+_stores = {}
+_lock = threading.Lock()
+
+
+class ArtifactStore:
+    """Content-addressed artifact storage on one database's GridFS bucket."""
+
+    def __init__(self, db, bucket_name=BUCKET_NAME):
+        import gridfs  # imported on first use with pymongo
+        from pymongo.errors import OperationFailure
+
+        self.bucket = gridfs.GridFSBucket(db, bucket_name=bucket_name, chunk_size_bytes=CHUNK_SIZE)
+        self.files = db[f"{bucket_name}.files"]
+        self.chunks = db[f"{bucket_name}.chunks"]
+        try:
+            self.files.create_index("metadata.sha256", unique=True, name=SHA256_INDEX)
+        except OperationFailure as e:
+            # Duplicates stored before the index existed; dedup stays best effort
+            print(f"⚠️ Could not create the unique artifact hash index: {e}")
+            self.files.create_index("metadata.sha256")
+
+    def find(self, sha256):
+        """Return the file document stored for `sha256`, or None."""
+        return self.files.find_one({"metadata.sha256": sha256})
+
+    def put(self, data, filename, content_type="application/octet-stream"):
+        """Store `data` unless identical bytes exist; returns (file id, sha256, deduplicated)."""
+        from bson import ObjectId
+        from gridfs.errors import FileExists
+        from pymongo.errors import DuplicateKeyError
+
+        sha256 = hashlib.sha256(data).hexdigest()
+        existing = self.find(sha256)
+        if existing is not None:
+            return existing["_id"], sha256, True
+        file_id = ObjectId()
+        try:
+            self.bucket.upload_from_stream_with_id(
+                file_id,
+                filename,
+                io.BytesIO(data),  # read in chunk-sized pieces
+                metadata={"sha256": sha256, "content_type": content_type},
+            )
+        except (DuplicateKeyError, FileExists):
+            # A concurrent put stored the same bytes first (GridFS reports the
+            # unique hash index violation as FileExists): drop our chunks, use its file
+            self.chunks.delete_many({"files_id": file_id})
+            existing = self.find(sha256)
+            if existing is None:
+                raise
+            return existing["_id"], sha256, True
+        return file_id, sha256, False
+
+    def open(self, file_id):
+        """Return a GridOut that reads the artifact chunk by chunk (supports seek)."""
+        return self.bucket.open_download_stream(file_id)
+
+
+def get_artifact_store(db=None):
+    """Return the shared ArtifactStore of `db` (default: the configured database)."""
+    db = db if db is not None else get_database()
+    key = (id(db.client), db.name)
+    store = _stores.get(key)
+    if store is None:
+        with _lock:
+            store = _stores.get(key)
+            if store is None:
+                store = _stores[key] = ArtifactStore(db)
+    return store
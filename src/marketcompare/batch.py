@@ -0,0 +1,119 @@
+"""Analyse several target companies in one invocation.
+
+Usage: batch MANIFEST [--max-concurrency N]
+
+The manifest is a JSON file listing the targets; each names the company,
+its preference document and its documents in Market_LLM_Input (input
+variable -> originalFileName; variables left out are passed empty):
+
+    {"targets": [
+        {"company_name": "Innovatech Solutions Ltd.",
+         "user_preference": "innovatech_preferences.txt",
+         "documents": {"annual_report_2024": "innovatech_annual_report_2024.txt"}}
+    ]}
+
+A target without `documents` uses the default document set of run().
+Targets run concurrently on one process-wide pool capped by
+--max-concurrency (MARKETCOMPARE_BATCH_CONCURRENCY, default 2). They run
+in one process and share the LLM completion, task output and chart caches
+and the tool instances, so a completion or task another target already
+produced with the same inputs is reused instead of recomputed. Reports
+are only stored in MongoDB (tagged with their `company_name`); nothing is
+written to the working directory, where concurrent targets would collide.
+"""
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from .charts import enable_render_pool
+from .progress import RunProgress
+
+
+class ManifestError(ValueError):
+    """Raised when a batch manifest is malformed."""
+
+
+def load_manifest(path):
+    """Read and validate a manifest; returns the list of target dicts."""
+    try:
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError) as e:
+        raise ManifestError(f"Cannot read manifest {path}: {e}")
+    targets = data.get("targets") if isinstance(data, dict) else data
+    if not isinstance(targets, list) or not targets:
+        raise ManifestError("Manifest must contain a non-empty 'targets' list")
+    for i, target in enumerate(targets):
+        if not isinstance(target, dict) or not target.get("company_name"):
+            raise ManifestError(f"Target {i} has no 'company_name'")
+        if not isinstance(target.get("documents", {}), dict):
+            raise ManifestError(f"Target {i} 'documents' must map input variables to document names")
+    return targets
+
+
+def target_documents(target):
+    """Input variable -> document name for a target, or None for the default set."""
+    documents = target.get("documents")
+    if documents is None and not target.get("user_preference"):
+        return None
+    if documents is None:
+        from .main import DEFAULT_FILE_NAMES
+        documents = DEFAULT_FILE_NAMES
+    documents = dict(documents)
+    if target.get("user_preference"):
+        documents["user_preference"] = target["user_preference"]
+    return documents
+
+
+def _run_target(target):
+    from .main import run
+
+    started = time.monotonic()
+    name = target["company_name"]
+    progress = RunProgress(run_id=name)
+    try:
+        report = run(progress=progress, company_name=name, documents=target_documents(target), save_files=False)
+    except Exception as e:
+        return {"company_name": name, "status": "failed", "error": str(e),
+                "duration": round(time.monotonic() - started, 3)}
+    return {"company_name": name, "status": "succeeded", "report_id": report.get("_id"),
+            "duration": round(time.monotonic() - started, 3)}
+
+
+def run_batch(targets, max_concurrency=None):
+    """Run every target, at most `max_concurrency` at once; returns one result per target, in order."""
+    if max_concurrency is None:
+        max_concurrency = int(os.getenv("MARKETCOMPARE_BATCH_CONCURRENCY", "2"))
+    with ThreadPoolExecutor(max_workers=max(1, max_concurrency), thread_name_prefix="batch") as pool:
+        return list(pool.map(_run_target, targets))
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Analyse several target companies in one invocation")
+    parser.add_argument("manifest", help="JSON manifest listing the target companies")
+    parser.add_argument("--max-concurrency", type=int, default=None, help="targets analysed at once")
+    args = parser.parse_args()
+    enable_render_pool()
+
+    try:
+        targets = load_manifest(args.manifest)
+    except ManifestError as e:
+        raise SystemExit(f"❌ {e}")
+    results = run_batch(targets, max_concurrency=args.max_concurrency)
+
+    print(f"📦 Batch of {len(results)} targets")
+    for result in results:
+        if result["status"] == "succeeded":
+            print(f"  ✅ {result['company_name']}: report {result['report_id']} ({result['duration']}s)")
+        else:
+            print(f"  ❌ {result['company_name']}: {result['error']}")
+    if any(result["status"] != "succeeded" for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
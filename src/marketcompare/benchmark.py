@@ -0,0 +1,413 @@
+"""Offline end-to-end benchmark of run() with a fake LLM, fake search and local Mongo.
+
+Usage: benchmark [--runs N] [--concurrency 1,4] [--warmup N] [--mongo-uri URI]
+                 [--llm-latency-ms MS] [--cassette PATH] [--history PATH]
+                 [--tolerance 0.2] [--verbose]
+
+The crew runs in DAG mode with the LLM, task, chart and tool caches off.
+The competitor store stays on: after the warmup, runs reuse the stored
+intelligence on the fake competitors, and the summary reports how many
+runs did. The fake LLM answers every task with a schema-valid output for its
+`enhanced_models` type (research agents first issue one search so the tool
+path is exercised), the Serper and website search tools return canned results, and
+Mongo is mongomock (pip install mongomock) unless --mongo-uri points at a
+local mongod. With --cassette the LLM and search traffic recorded from a
+real DAG-mode run is replayed instead of the fake answers (see
+cassette.py). The benchmark reports per-stage latency from the timing
+spans, latency percentiles and throughput per concurrency level, and the
+tracemalloc peak. Each result is appended to a JSONL history
+(MARKETCOMPARE_BENCHMARK_HISTORY, default ./benchmark_history.jsonl); the
+command exits non-zero when p50 latency or peak memory regresses by more
+than the tolerance against the median of the last five comparable runs.
+"""
+import contextlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import typing
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, UTC
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, Type
+
+from pydantic import BaseModel, Field
+
+from .charts import enable_render_pool
+from .llm import CachedLLM
+from .progress import RunProgress, current_task_name
+
+COMPANY_DOCS = Path(__file__).resolve().parent / "company_docs"
+BENCHMARK_MONGODB_URI = "mongodb://benchmark.invalid/"
+DEFAULT_HISTORY = "benchmark_history.jsonl"
+SEARCH_TOOL_NAME = "Search the internet with Serper"
+# The ReAct prompt itself mentions "Observation:", so the canned result is what
+# tells the fake LLM that the search already ran.
+SEARCH_RESULT_LINK = "https://example.com/report"
+
+# Competitors the fake init task asks for and the fake analysis reports, so
+# the competitor store finds what an earlier run saved
+SAMPLE_COMPETITORS = ("Competitor 1", "Competitor 2")
+# Field values the generic sample generator cannot invent (validators, aliases)
+_FIELD_SAMPLES = {"impact": "medium", "$oid": "0123456789abcdef01234567", "oid": "0123456789abcdef01234567"}
+
+# run() reads these keys of the final report to build the PDF text and charts
+FINAL_REPORT_SAMPLE = {
+    "swot_analysis": {
+        "strengths": ["High gross margin (79.0%)", "Growing ProjectFlow subscriptions"],
+        "weaknesses": ["Small sales team", "Limited brand awareness"],
+        "opportunities": ["Mid-market expansion in Europe", "AI-assisted planning features"],
+        "threats": ["Aggressive competitor discounting", "Rising hosting costs"],
+    },
+    "pricing_comparison": {
+        "our_pricing": [
+            {"product_line": "ProjectFlow", "price_range": "$12-$24 per user/month"},
+            {"product_line": "DataSift", "price_range": "$30-$60 per user/month"},
+        ],
+        "competitor_pricing": [
+            {"competitor": "Competitor A", "price_range": "$10-$25 per user/month"},
+            {"competitor": "Competitor B", "price_range": "$35-$70 per user/month"},
+        ],
+    },
+    "competitive_positioning": {
+        "market_share": "4% of the mid-market segment",
+        "key_differentiators": ["Integrated analytics", "Fast onboarding"],
+        "target_segments": ["Mid-size software teams", "Agencies"],
+    },
+    "market_analysis": {
+        "industry_trends": ["Consolidation of work-management tools", "AI copilots in planning"],
+        "market_growth": "11% CAGR through 2028",
+    },
+    "recommendations": {
+        "immediate_actions": ["Launch annual-plan discount", "Publish competitor comparison pages"],
+        "long_term_initiatives": ["Ship AI planning assistant", "Open a European sales office"],
+    },
+}
+
+
+def sample_value(annotation: Any, name: str) -> Any:
+    """Deterministic, schema-valid sample for a pydantic field annotation."""
+    if name in _FIELD_SAMPLES:
+        return _FIELD_SAMPLES[name]
+    origin = typing.get_origin(annotation)
+    args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+    if origin is typing.Union:
+        return sample_value(args[0], name)
+    if origin is list:
+        if name == "competitors":
+            return list(SAMPLE_COMPETITORS)
+        return [sample_value(args[0] if args else str, name) for _ in range(2)]
+    if origin is dict:
+        value_type = args[1] if len(args) > 1 else str
+        return {competitor: sample_value(value_type, name) for competitor in SAMPLE_COMPETITORS}
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return sample_model(annotation)
+    if annotation in (int, float):
+        return annotation(1)
+    if annotation is bool:
+        return True
+    return f"Sample {name.replace('_', ' ')}"
+
+
+def sample_model(model: Type[BaseModel]) -> Dict[str, Any]:
+    """Sample payload that validates against `model` (by alias, as an LLM would answer)."""
+    data = {
+        field.alias or name: sample_value(field.annotation, field.alias or name)
+        for name, field in model.model_fields.items()
+    }
+    model.model_validate(data)
+    return data
+
+
+def sample_output(model: Type[BaseModel]) -> Dict[str, Any]:
+    from .enhanced_models import FinalReportOutput
+
+    if model is FinalReportOutput:
+        return dict(FINAL_REPORT_SAMPLE, ID={"$oid": _FIELD_SAMPLES["$oid"]})
+    return sample_model(model)
+
+
+class BenchmarkLLM(CachedLLM):
+    """Fake LLM answering in crewAI's ReAct format without network access.
+
+    `task_outputs` maps task names to their output models. An agent that has
+    the search tool first receives one search action; once the observation
+    is in the conversation (and for every other agent) the answer is a
+    'Final Answer:' with a sample output for the running task.
+    """
+
+    task_outputs: typing.ClassVar[Dict[str, Type[BaseModel]]] = {}
+    latency_seconds: typing.ClassVar[float] = 0.0
+
+    def _complete(self, messages, started, **kwargs):
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        text = messages if isinstance(messages, str) else "\n".join(str(m.get("content", "")) for m in messages)
+        if SEARCH_TOOL_NAME in text and SEARCH_RESULT_LINK not in text:
+            query = json.dumps({"search_query": "project management software market trends 2025"})
+            return (
+                "Thought: I need current market data first.\n"
+                f"Action: {SEARCH_TOOL_NAME}\n"
+                f"Action Input: {query}"
+            )
+        model = self.task_outputs.get(current_task_name())
+        payload = sample_output(model) if model else {}
+        return f"Thought: I now know the final answer\nFinal Answer: {json.dumps(payload)}"
+
+
+class SearchInput(BaseModel):
+    search_query: str = Field(..., description="Search query")
+
+
+class WebsiteSearchInput(BaseModel):
+    search_query: str = Field(..., description="Search query")
+    website: str = Field(..., description="Website to search")
+
+
+def _fake_tools():
+    from crewai.tools import BaseTool
+
+    class _FakeSearchTool(BaseTool):
+        name: str = SEARCH_TOOL_NAME
+        description: str = "Offline stand-in for SerperDevTool returning canned results."
+        args_schema: Type[BaseModel] = SearchInput
+
+        def _run(self, search_query: str) -> str:
+            return json.dumps({
+                "searchParameters": {"q": search_query},
+                "organic": [
+                    {"title": f"{search_query} - industry report", "link": SEARCH_RESULT_LINK,
+                     "snippet": "The market grew 11% in 2024, led by mid-market adoption."},
+                    {"title": "Competitor pricing overview", "link": "https://example.com/pricing",
+                     "snippet": "Plans range from $10 to $70 per user per month."},
+                ],
+            })
+
+    class _FakeWebsiteSearchTool(BaseTool):
+        name: str = "Search in a specific website"
+        description: str = "Offline stand-in for WebsiteSearchTool returning canned passages."
+        args_schema: Type[BaseModel] = WebsiteSearchInput
+
+        def _run(self, search_query: str, website: str) -> str:
+            return f"Relevant content from {website}: pricing starts at $12 per user per month."
+
+    return _FakeSearchTool(), _FakeWebsiteSearchTool()
+
+
+def _seed_inputs(uri):
+    from .mongo import get_database
+
+    collection = get_database(uri=uri)["Market_LLM_Input"]
+    for path in sorted(COMPANY_DOCS.rglob("*.txt")):
+        collection.insert_one({
+            "originalFileName": path.name,
+            "content": path.read_text(encoding="utf-8"),
+            "uploadedAt": datetime.now(UTC),
+        })
+
+
+def mongomock_client():
+    """A mongomock client whose GridFS buckets work, so report artifacts are really stored."""
+    import mongomock
+    from mongomock.gridfs import enable_gridfs_integration
+
+    enable_gridfs_integration()
+    client = mongomock.MongoClient()
+    # pymongo's GridFS applies client.options.timeout to every operation;
+    # mongomock has no client options, and the attribute lookup would
+    # otherwise return a database/collection instead of None
+    client.options = SimpleNamespace(timeout=None)
+    return client
+
+
+def setup(mongo_uri=None, llm_latency_ms=0.0, cassette=None):
+    """Point run() at the fakes; returns the Mongo URI the runs will use."""
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+    os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+    os.environ["MARKETCOMPARE_EXECUTION_MODE"] = "dag"
+    os.environ["MARKETCOMPARE_LLM_CACHE"] = "off"
+    os.environ["MARKETCOMPARE_TASK_CACHE"] = "off"
+    os.environ["MARKETCOMPARE_CHART_CACHE"] = "off"
+    os.environ["MARKETCOMPARE_TOOL_CACHE"] = "off"
+    os.environ["MARKETCOMPARE_RATE_LIMIT"] = "off"
+
+    from .crew import Marketcompare, override_tool
+    from .llm import set_llm_class
+    from .mongo import register_client
+    from .spans import logger as span_logger, set_spans_enabled
+
+    set_spans_enabled(True)
+    span_logger.setLevel("WARNING")
+
+    if cassette is not None:
+        from .cassette import Cassette, set_cassette
+        set_cassette(Cassette(cassette))
+    else:
+        search_tool, web_rag_tool = _fake_tools()
+        override_tool("search", search_tool)
+        override_tool("web_rag", web_rag_tool)
+        set_llm_class(BenchmarkLLM)
+        BenchmarkLLM.latency_seconds = llm_latency_ms / 1000.0
+        BenchmarkLLM.task_outputs = {
+            task.name: task.output_pydantic for task in Marketcompare().crew().tasks if task.output_pydantic
+        }
+
+    if mongo_uri is None:
+        try:
+            client = mongomock_client()
+        except ImportError:
+            raise SystemExit("❌ mongomock is not installed; pip install mongomock or pass --mongo-uri")
+        mongo_uri = BENCHMARK_MONGODB_URI
+        register_client(mongo_uri, client)
+    os.environ["MONGODB_URI"] = mongo_uri
+    os.environ["DB_NAME"] = "marketcompare_benchmark"
+    _seed_inputs(mongo_uri)
+    return mongo_uri
+
+
+def _timed_run():
+    """Latency of one run and whether it reused stored competitor intelligence."""
+    from .main import run
+
+    started = time.perf_counter()
+    report = run(progress=RunProgress())
+    competitors = report.get("run_metrics", {}).get("tasks", {}).get("competitor_analysis_task", {})
+    return time.perf_counter() - started, bool(competitors.get("cached_output"))
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def run_benchmark(runs=3, concurrency=(1,), warmup=1, quiet=True):
+    """Run the pipeline `runs` times per concurrency level and summarise."""
+    from .spans import registry
+
+    sink = open(os.devnull, "w") if quiet else None
+    output = contextlib.redirect_stdout(sink) if quiet else contextlib.nullcontext()
+    with tempfile.TemporaryDirectory() as workdir, output:
+        cwd = os.getcwd()
+        os.chdir(workdir)  # run() writes the PDF to the working directory
+        try:
+            for _ in range(warmup):
+                _timed_run()
+            registry.reset()
+            tracemalloc.start()
+            levels = {}
+            for workers in concurrency:
+                started = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    latencies, reused = zip(*pool.map(lambda _: _timed_run(), range(runs)))
+                wall = time.perf_counter() - started
+                levels[str(workers)] = {
+                    "runs": runs,
+                    "competitors_reused": sum(reused),
+                    "wall_seconds": round(wall, 3),
+                    "throughput_runs_per_min": round(runs / wall * 60, 2),
+                    "latency_p50_ms": round(_percentile(latencies, 0.5) * 1000, 1),
+                    "latency_p95_ms": round(_percentile(latencies, 0.95) * 1000, 1),
+                    "latency_mean_ms": round(statistics.mean(latencies) * 1000, 1),
+                }
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        finally:
+            os.chdir(cwd)
+    if sink is not None:
+        sink.close()
+
+    stages = {
+        name: {"count": count, "mean_ms": round(total / count * 1000, 2)}
+        for name, (count, total) in sorted(registry.snapshot().items()) if count
+    }
+    return {"levels": levels, "stages": stages, "peak_memory_mb": round(peak / (1024 * 1024), 2)}
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def check_regressions(result, history, tolerance):
+    """Compare with the median of the last five comparable entries; returns messages."""
+    config = result["config"]
+    previous = [entry for entry in history if entry.get("config") == config][-5:]
+    if not previous:
+        return []
+    problems = []
+    for level, stats in result["levels"].items():
+        baseline = [entry["levels"][level]["latency_p50_ms"] for entry in previous if level in entry.get("levels", {})]
+        if baseline and stats["latency_p50_ms"] > statistics.median(baseline) * (1 + tolerance):
+            problems.append(f"p50 latency at concurrency {level}: {stats['latency_p50_ms']} ms "
+                            f"vs baseline {statistics.median(baseline)} ms")
+    baseline_memory = statistics.median(entry["peak_memory_mb"] for entry in previous)
+    if result["peak_memory_mb"] > baseline_memory * (1 + tolerance):
+        problems.append(f"peak memory: {result['peak_memory_mb']} MB vs baseline {baseline_memory} MB")
+    return problems
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Offline benchmark of the market comparison pipeline")
+    parser.add_argument("--runs", type=int, default=3, help="runs per concurrency level")
+    parser.add_argument("--concurrency", default="1", help="comma-separated concurrency levels, e.g. 1,4")
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--mongo-uri", default=None, help="local mongod to use instead of mongomock")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="simulated model latency per call")
+    parser.add_argument("--cassette", default=None, help="replay this recorded cassette instead of the fake LLM")
+    parser.add_argument("--history", default=os.getenv("MARKETCOMPARE_BENCHMARK_HISTORY", DEFAULT_HISTORY))
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed regression, 0.2 = 20%%")
+    parser.add_argument("--verbose", action="store_true", help="show the crew's output")
+    args = parser.parse_args()
+
+    concurrency = [int(level) for level in args.concurrency.split(",") if level.strip()]
+    enable_render_pool()
+    setup(mongo_uri=args.mongo_uri, llm_latency_ms=args.llm_latency_ms, cassette=args.cassette)
+    result = run_benchmark(runs=args.runs, concurrency=concurrency, warmup=args.warmup, quiet=not args.verbose)
+    result = {
+        "timestamp": datetime.now(UTC).isoformat(),
+        "revision": _git_revision(),
+        "config": {"runs": args.runs, "llm_latency_ms": args.llm_latency_ms,
+                   "mongo": "mongod" if args.mongo_uri else "mongomock", "cassette": args.cassette},
+        **result,
+    }
+
+    print(f"📊 Benchmark ({result['revision'] or 'unknown revision'})")
+    for level, stats in result["levels"].items():
+        print(f"  concurrency {level}: p50 {stats['latency_p50_ms']} ms, p95 {stats['latency_p95_ms']} ms, "
+              f"{stats['throughput_runs_per_min']} runs/min, "
+              f"stored competitor intelligence reused in {stats['competitors_reused']}/{stats['runs']} runs")
+    print("  stages (mean):")
+    for name, stats in result["stages"].items():
+        print(f"    {stats['mean_ms']:10.2f} ms  {name} (x{stats['count']})")
+    print(f"  peak traced memory: {result['peak_memory_mb']} MB")
+
+    history_path = Path(args.history)
+    history = []
+    if history_path.exists():
+        history = [json.loads(line) for line in history_path.read_text().splitlines() if line.strip()]
+    problems = check_regressions(result, history, args.tolerance)
+    with history_path.open("a") as f:
+        f.write(json.dumps(result) + "\n")
+
+    if problems:
+        for problem in problems:
+            print(f"❌ Regression: {problem}")
+        sys.exit(1)
+    print("✅ No regression against the benchmark history")
+
+
+if __name__ == "__main__":
+    main()
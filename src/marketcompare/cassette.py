@@ -0,0 +1,186 @@
+"""Record and replay the LLM and web search traffic of a run.
+
+Set MARKETCOMPARE_CASSETTE to a file path and MARKETCOMPARE_CASSETTE_MODE to
+`record` to capture every LLM completion and every SerperDevTool /
+WebsiteSearchTool call of a real run, or to `replay` (the default) to serve
+them back without network access. The cassette is a JSON-lines file, one
+call per line.
+
+Calls are matched by task, kind (llm or tool name) and position within the
+task, so replay stays deterministic when independent tasks run in parallel.
+Each entry also stores a hash of its request: with
+MARKETCOMPARE_CASSETTE_MATCH=sequence (the default) a changed prompt, e.g.
+after editing tasks.yaml, still gets the recorded answer and is only
+counted; with `exact` it raises CassetteMiss.
+"""
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Type
+
+from pydantic import BaseModel
+
+from .cache import make_key
+from .progress import current_task_name
+
+RECORD = "record"
+REPLAY = "replay"
+SEQUENCE_MATCH = "sequence"
+EXACT_MATCH = "exact"
+
+_cassette = None
+_cassette_lock = threading.Lock()
+
+
+class CassetteMiss(Exception):
+    """Raised in replay mode when a call has no matching recorded entry."""
+
+
+class Cassette:
+    """JSON-lines store of recorded LLM and tool calls.
+
+    Opening a cassette in record mode truncates the file; in replay mode the
+    whole file is loaded up front. Safe to share between threads.
+    """
+
+    def __init__(self, path, mode=REPLAY, match=SEQUENCE_MATCH):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown cassette mode '{mode}', expected '{RECORD}' or '{REPLAY}'")
+        if match not in (SEQUENCE_MATCH, EXACT_MATCH):
+            raise ValueError(f"Unknown cassette match '{match}', expected '{SEQUENCE_MATCH}' or '{EXACT_MATCH}'")
+        self.path = Path(path)
+        self.mode = mode
+        self.match = match
+        self.recorded = 0
+        self.replayed = 0
+        self.mismatches = 0
+        self._entries = {}
+        self._tools = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._file = None
+        if mode == RECORD:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = self.path.open("w", encoding="utf-8")
+        else:
+            with self.path.open(encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries[(entry["kind"], entry["task"], entry["seq"])] = entry
+
+    @property
+    def replaying(self):
+        return self.mode == REPLAY
+
+    def start_task(self):
+        """Restart the per-task call numbering of the current thread."""
+        self._local.counts = {}
+
+    def _next_seq(self, kind):
+        counts = getattr(self._local, "counts", None)
+        if counts is None:
+            counts = self._local.counts = {}
+        key = (current_task_name(), kind)
+        counts[key] = counts.get(key, 0) + 1
+        return counts[key]
+
+    def record(self, kind, request_key, request, response):
+        entry = {
+            "kind": kind,
+            "task": current_task_name(),
+            "seq": self._next_seq(kind),
+            "request_key": request_key,
+            "request": request,
+            "response": response,
+        }
+        line = json.dumps(entry, default=str, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            self.recorded += 1
+
+    def play(self, kind, request_key):
+        """Return the recorded response for the next `kind` call of the current task."""
+        task = current_task_name()
+        seq = self._next_seq(kind)
+        entry = self._entries.get((kind, task, seq))
+        if entry is None:
+            raise CassetteMiss(f"No recorded {kind} call #{seq} for task '{task}' in {self.path}")
+        with self._lock:
+            self.replayed += 1
+            if entry["request_key"] != request_key:
+                if self.match == EXACT_MATCH:
+                    raise CassetteMiss(f"{kind} call #{seq} for task '{task}' differs from the recorded request")
+                self.mismatches += 1
+        return entry["response"]
+
+    def tool(self, tool_class, factory):
+        """Return a recording/replaying stand-in for the crewAI tool `tool_class`.
+
+        `factory` creates the real tool; it is only called when recording.
+        """
+        with self._lock:
+            wrapped = self._tools.get(tool_class)
+            if wrapped is None:
+                wrapped = self._tools[tool_class] = _cassette_tool(self, tool_class, factory)
+        return wrapped
+
+    def stats(self):
+        return {
+            "mode": self.mode,
+            "recorded": self.recorded,
+            "replayed": self.replayed,
+            "mismatches": self.mismatches,
+        }
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def _cassette_tool(cassette, tool_class, factory):
+    from crewai.tools import BaseTool
+
+    fields = tool_class.model_fields
+
+    class CassetteTool(BaseTool):
+        name: str = fields["name"].default
+        description: str = fields["description"].default
+        args_schema: Type[BaseModel] = fields["args_schema"].default
+
+        def _run(self, **kwargs):
+            request_key = make_key(self.name, kwargs)
+            if cassette.replaying:
+                return cassette.play(self.name, request_key)
+            response = factory().run(**kwargs)
+            cassette.record(self.name, request_key, kwargs, response)
+            return response
+
+    return CassetteTool()
+
+
+def get_cassette():
+    """Return the active cassette, or None when recording/replay is off."""
+    global _cassette
+    path = os.getenv("MARKETCOMPARE_CASSETTE")
+    if _cassette is None and path:
+        with _cassette_lock:
+            if _cassette is None:
+                _cassette = Cassette(
+                    path,
+                    mode=os.getenv("MARKETCOMPARE_CASSETTE_MODE", REPLAY).strip().lower(),
+                    match=os.getenv("MARKETCOMPARE_CASSETTE_MATCH", SEQUENCE_MATCH).strip().lower(),
+                )
+    return _cassette
+
+
+def set_cassette(cassette):
+    """Make `cassette` the active one (None turns recording/replay off)."""
+    global _cassette
+    with _cassette_lock:
+        if _cassette is not None and _cassette is not cassette:
+            _cassette.close()
+        _cassette = cassette
@@ -0,0 +1,210 @@
+"""Report charts rendered with matplotlib's object-oriented Agg API.
+
+Each chart is described by a small, picklable spec (chart kind plus the
+plotted data). `render_charts` serves PNG bytes from a persistent cache
+keyed on a hash of the spec, so regenerating a report with unchanged SWOT,
+pricing or recommendation data skips rendering. No pyplot global state is
+touched, so charts of concurrent runs cannot interfere.
+
+Misses are rendered in the calling process unless the process pool is
+enabled, either with MARKETCOMPARE_CHART_WORKERS=<n> or by a command-line
+entry point calling `enable_render_pool()` (batch, benchmark and the API
+do). The pool spawns its workers, and spawned workers import the parent's
+`__main__` again: a script that enables the pool must keep its top-level
+code under `if __name__ == "__main__":`, or every worker runs it again.
+
+MARKETCOMPARE_CHART_CACHE=off bypasses the cache and
+MARKETCOMPARE_CHART_CACHE_MAX_MB bounds it.
+"""
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .cache import DiskCache, cache_dir, env_flag, make_key
+
+# Bump when the drawing code changes so cached PNGs are re-rendered
+RENDERER_VERSION = 1
+
+SWOT = "swot"
+PRICING = "pricing"
+RECOMMENDATIONS = "recommendations"
+
+_chart_cache = None
+_pool = None
+_lock = threading.Lock()
+# Pool size when MARKETCOMPARE_CHART_WORKERS is unset (see enable_render_pool)
+_default_workers = 0
+
+
+def get_chart_cache():
+    """Return the shared PNG cache, or None when it is bypassed."""
+    global _chart_cache
+    if not env_flag("MARKETCOMPARE_CHART_CACHE"):
+        return None
+    if _chart_cache is None:
+        with _lock:
+            if _chart_cache is None:
+                max_mb = int(os.getenv("MARKETCOMPARE_CHART_CACHE_MAX_MB", "64"))
+                _chart_cache = DiskCache(cache_dir() / "charts.sqlite3", max_bytes=max_mb * 1024 * 1024)
+    return _chart_cache
+
+
+def chart_workers():
+    return int(os.getenv("MARKETCOMPARE_CHART_WORKERS", str(_default_workers)))
+
+
+def enable_render_pool():
+    """Render in a pool of up to 3 worker processes by default.
+
+    Only for programs whose `__main__` is safe to import again (see the
+    module docstring); library callers of run() render in-process.
+    """
+    global _default_workers
+    _default_workers = min(3, os.cpu_count() or 1)
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        with _lock:
+            if _pool is None:
+                # spawn: forking a process that runs crew threads is unsafe
+                _pool = ProcessPoolExecutor(max_workers=chart_workers(),
+                                            mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def shutdown_pool():
+    """Stop the render workers; the next render starts a new pool."""
+    global _pool
+    with _lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+# -- specs -----------------------------------------------------------------
+
+def report_chart_specs(report):
+    """Specs of the three report charts for a final report dict."""
+    swot = report.get('swot_analysis', {}) or {}
+    pricing = report.get('pricing_comparison', {}) or {}
+    recommendations = report.get('recommendations', {}) or {}
+    our_pricing = pricing.get('our_pricing', []) or []
+    competitor_pricing = pricing.get('competitor_pricing', []) or []
+    return [
+        {
+            "kind": SWOT,
+            "counts": [len(swot.get(key, [])) for key in ('strengths', 'weaknesses', 'opportunities', 'threats')],
+        },
+        {
+            "kind": PRICING,
+            "products": [p.get('product_line', f'Product {i}') for i, p in enumerate(our_pricing)],
+            "ours": [p.get('price_range', '0') for p in our_pricing],
+            "competitors": [p.get('price_range', '0') for p in competitor_pricing[:len(our_pricing)]],
+            "available": bool(our_pricing and competitor_pricing),
+        },
+        {
+            "kind": RECOMMENDATIONS,
+            "immediate": len(recommendations.get('immediate_actions', []) or []),
+            "long_term": len(recommendations.get('long_term_initiatives', []) or []),
+        },
+    ]
+
+
+def chart_key(spec):
+    return make_key("chart", RENDERER_VERSION, spec)
+
+
+# -- rendering -------------------------------------------------------------
+
+def _labelled_bars(ax, categories, counts, colors):
+    bars = ax.bar(categories, counts, color=colors)
+    for bar, count in zip(bars, counts):
+        ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.1,
+                str(count), ha='center', va='bottom', fontweight='bold')
+    ax.grid(axis='y', alpha=0.3)
+
+
+def _draw_swot(ax, spec):
+    _labelled_bars(ax, ['Strengths', 'Weaknesses', 'Opportunities', 'Threats'], spec["counts"],
+                   ['#28a745', '#dc3545', '#ffc107', '#6c757d'])
+    ax.set_title('SWOT Analysis Summary', fontsize=16, fontweight='bold')
+    ax.set_ylabel('Number of Items', fontsize=12)
+
+
+def _draw_pricing(ax, spec):
+    ax.set_title('Pricing Comparison', fontsize=16, fontweight='bold')
+    if not spec["available"]:
+        ax.text(0.5, 0.5, 'Pricing data not available', ha='center', va='center', transform=ax.transAxes)
+        return
+    x = range(len(spec["products"]))
+    width = 0.35
+    ax.bar([i - width/2 for i in x], spec["ours"], width, label='Our Pricing', color='#A23B72')
+    ax.bar([i + width/2 for i in x], spec["competitors"], width, label='Competitor Pricing', color='#2E86AB')
+    ax.set_ylabel('Price Range', fontsize=12)
+    ax.set_xlabel('Products', fontsize=12)
+    ax.set_xticks(x)
+    ax.set_xticklabels(spec["products"], rotation=45)
+    ax.legend()
+    ax.grid(axis='y', alpha=0.3)
+
+
+def _draw_recommendations(ax, spec):
+    if not (spec["immediate"] and spec["long_term"]):
+        ax.text(0.5, 0.5, 'Recommendations data not available', ha='center', va='center', transform=ax.transAxes)
+        ax.set_title('Strategic Recommendations', fontsize=16, fontweight='bold')
+        return
+    _labelled_bars(ax, ['Immediate Actions', 'Long-term Initiatives'], [spec["immediate"], spec["long_term"]],
+                   ['#28a745', '#17a2b8'])
+    ax.set_title('Strategic Recommendations Distribution', fontsize=16, fontweight='bold')
+    ax.set_ylabel('Number of Recommendations', fontsize=12)
+
+
+_DRAW = {SWOT: _draw_swot, PRICING: _draw_pricing, RECOMMENDATIONS: _draw_recommendations}
+
+
+def render_chart(spec):
+    """Render one chart spec to PNG bytes (runs in the worker processes)."""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(10, 6))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    _DRAW[spec["kind"]](ax, spec)
+    fig.tight_layout()
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', bbox_inches='tight')
+    return buf.getvalue()
+
+
+def _render_all(specs):
+    if chart_workers() <= 0 or len(specs) < 2:
+        return [render_chart(spec) for spec in specs]
+    try:
+        return list(_get_pool().map(render_chart, specs))
+    except BrokenProcessPool:
+        shutdown_pool()
+        return [render_chart(spec) for spec in specs]
+
+
+def render_charts(specs):
+    """PNG bytes for every spec, in order: cached ones reused, the rest rendered in parallel."""
+    cache = get_chart_cache()
+    images = [None] * len(specs)
+    keys = [chart_key(spec) for spec in specs]
+    if cache is not None:
+        for i, key in enumerate(keys):
+            images[i] = cache.get(key)
+    missing = [i for i, image in enumerate(images) if image is None]
+    if missing:
+        rendered = _render_all([specs[i] for i in missing])
+        for i, image in zip(missing, rendered):
+            images[i] = image
+            if cache is not None:
+                cache.set(keys[i], image)
+    return images
@@ -0,0 +1,155 @@
+"""Shared store of per-competitor intelligence with a freshness TTL.
+
+Competitor pricing and features change over weeks, not runs, so each
+researched `CompetitorDetail` is kept in the `Competitor_Intelligence`
+collection with its fetch time. `CompetitorAnalysisTask` injects fresh
+entries straight into its output and asks the agent to research only the
+stale or missing competitors; when every competitor is fresh the task
+does not call the model at all. The store lives in MongoDB, so daily runs,
+batch targets and API workers all share it. It replaces the task cache for
+this task: only intelligence the agent actually researched is saved, so a
+stored entry's `fetched_at` is the time it was really fetched.
+
+MARKETCOMPARE_COMPETITOR_CACHE=off bypasses the store and
+MARKETCOMPARE_COMPETITOR_TTL_HOURS (default 168) sets the freshness window.
+"""
+import json
+import os
+import re
+from datetime import datetime, timedelta, UTC
+
+from .cache import env_flag
+from .cassette import get_cassette
+from .enhanced_models import CompetitorAnalysisOutput, CompetitorDetail, InitTaskOutput
+from .mongo import get_database
+from .task_cache import CachedTask
+
+COLLECTION_NAME = "Competitor_Intelligence"
+DEFAULT_TTL_HOURS = 168
+
+# Content the task uses for competitors it could not research
+NOT_FOUND_MARKER = "DATA_NOT_FOUND"
+
+
+def competitor_key(name):
+    """Normalised identity of a competitor name ('TaskMaster  Pro' == 'taskmaster pro')."""
+    return re.sub(r"\s+", " ", name).strip().casefold()
+
+
+def _is_placeholder(detail):
+    items = [item for field in ("pricing", "discount_strategies", "product_features",
+                                "customer_satisfaction", "innovation_indicators")
+             for item in getattr(detail, field)]
+    return not items or all(item.content.startswith(NOT_FOUND_MARKER) for item in items)
+
+
+class CompetitorStore:
+    """CompetitorDetail records keyed by normalised competitor name."""
+
+    def __init__(self, collection, ttl):
+        self.collection = collection
+        self.ttl = ttl
+
+    def fresh(self, names):
+        """{requested name: CompetitorDetail} for the names fetched within the TTL."""
+        keys = {competitor_key(name): name for name in names}
+        cutoff = datetime.now(UTC) - self.ttl
+        found = {}
+        for doc in self.collection.find({"_id": {"$in": list(keys)}, "fetched_at": {"$gte": cutoff}}):
+            try:
+                found[keys[doc["_id"]]] = CompetitorDetail.model_validate(doc["detail"])
+            except Exception:
+                continue  # written by an older schema; research it again
+        return found
+
+    def save(self, competitors):
+        """Store researched competitors; placeholders without data are skipped. Returns the count."""
+        now = datetime.now(UTC)
+        saved = 0
+        for name, detail in competitors.items():
+            if _is_placeholder(detail):
+                continue
+            self.collection.replace_one(
+                {"_id": competitor_key(name)},
+                {"name": name, "detail": detail.model_dump(), "fetched_at": now},
+                upsert=True,
+            )
+            saved += 1
+        return saved
+
+
+def get_competitor_store():
+    """Return the competitor store, or None when it is bypassed."""
+    if not env_flag("MARKETCOMPARE_COMPETITOR_CACHE"):
+        return None
+    ttl_hours = float(os.getenv("MARKETCOMPARE_COMPETITOR_TTL_HOURS", str(DEFAULT_TTL_HOURS)))
+    return CompetitorStore(get_database()[COLLECTION_NAME], timedelta(hours=ttl_hours))
+
+
+class CompetitorAnalysisTask(CachedTask):
+    """Competitor analysis that only researches competitors without fresh stored intelligence.
+
+    The competitors come from the InitTaskOutput in the task's context.
+    The store is bypassed while a cassette records or replays a run.
+    """
+
+    def use_task_cache(self):
+        # A replayed task output would be saved as freshly fetched intelligence
+        return not self.requested_competitors() or get_competitor_store() is None
+
+    def requested_competitors(self):
+        for task in self.context if isinstance(self.context, list) else []:
+            output = getattr(task, "output", None)
+            if output is not None and isinstance(output.pydantic, InitTaskOutput):
+                return list(dict.fromkeys(name.strip() for name in output.pydantic.competitors if name.strip()))
+        return []
+
+    def _execute_core(self, agent, context, tools):
+        names = self.requested_competitors()
+        store = get_competitor_store() if names and get_cassette() is None else None
+        if store is None:
+            return super()._execute_core(agent, context, tools)
+
+        try:
+            fresh = store.fresh(names)
+        except Exception as e:
+            print(f"⚠️ Competitor store unavailable, researching every competitor: {e}")
+            return super()._execute_core(agent, context, tools)
+        missing = [name for name in names if name not in fresh]
+
+        if not missing:
+            print(f"♻️ Intelligence on all {len(names)} competitors is fresh, skipping research")
+            agent = agent or self.agent
+            if self.progress is not None:
+                self.progress.task_started(self.name, getattr(agent, "role", None))
+            result = CompetitorAnalysisOutput(competitors=fresh)
+            payload = {"raw": result.json_str(), "pydantic": result.model_dump(), "json_dict": None}
+            return self._restore_output(json.dumps(payload).encode("utf-8"), agent)
+
+        description = self.description
+        if fresh:
+            print(f"♻️ Reusing stored intelligence on {len(fresh)} competitors, researching {len(missing)}")
+            self.description = (
+                f"{description}\n\nCurrent intelligence on {', '.join(fresh)} is already on file and will be "
+                f"added to your output. Research and report ONLY these competitors: {', '.join(missing)}."
+            )
+        try:
+            output = super()._execute_core(agent, context, tools)
+        finally:
+            self.description = description
+
+        result = output.pydantic
+        if isinstance(result, CompetitorAnalysisOutput):
+            # Entries the agent merely repeated keep their original fetch time
+            fresh_keys = {competitor_key(name) for name in fresh}
+            try:
+                store.save({name: detail for name, detail in result.competitors.items()
+                            if competitor_key(name) not in fresh_keys})
+            except Exception as e:
+                print(f"⚠️ Could not store competitor intelligence: {e}")
+            researched = {competitor_key(name) for name in result.competitors}
+            for name, detail in fresh.items():
+                if competitor_key(name) not in researched:
+                    result.competitors[name] = detail
+            output.raw = result.json_str()
+        return output
@@ -1,9 +1,10 @@
 from crewai import Agent, Crew, Process, Task, LLM
 from crewai.project import CrewBase, agent, crew, task
 from crewai.agents.agent_builder.base_agent import BaseAgent
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import os
 import json
+from functools import lru_cache
 from pydantic import BaseModel, Field
 
 # Import the enhanced models for task outputs
@@ -17,20 +18,92 @@ from .enhanced_models import (
     FinalReportOutput,
     MarkdownReportOutput
 )
+from .cassette import get_cassette
+from .competitors import CompetitorAnalysisTask
+from .llm import build_llm
+from .page_index import build_website_search_tool, get_page_index
+from .progress import RunProgress
+from .ratelimit import get_limiter
+from .scheduling import DAG_MODE, apply_dag_schedule, get_execution_mode
+from .task_cache import CachedTask
+from .tool_cache import cached_tool, get_tool_cache
 
-# Import tools
-from crewai_tools import (
-    DirectoryReadTool,
-    FileReadTool,
-    SerperDevTool,
-    WebsiteSearchTool
-)
+# File the final report task writes its JSON output to
+REPORT_FILE = 'market_comparison_report.json'
+
+# Stored outputs of the tasks that research the web expire sooner than the
+# document-derived ones (see CachedTask.ttl_seconds)
+RESEARCH_TTL_HOURS = 24
+
+# Tools are created on first use so that importing this module stays cheap;
+# each getter returns one shared instance unless an override is registered
+# or a cassette is recording/replaying the search traffic. Search results
+# are served from the persistent tool cache (see tool_cache.py).
+_tool_overrides: Dict[str, Any] = {}
+
+
+def override_tool(name: str, tool: Any) -> None:
+    """Use `tool` for 'search' or 'web_rag' in every crew built afterwards (None restores the default)."""
+    if tool is None:
+        _tool_overrides.pop(name, None)
+    else:
+        _tool_overrides[name] = tool
+
+
+@lru_cache(maxsize=None)
+def get_docs_tool(directory: str = './company_docs'):
+    from crewai_tools import DirectoryReadTool
+    return DirectoryReadTool(directory=directory)
+
+
+@lru_cache(maxsize=None)
+def get_file_tool():
+    from crewai_tools import FileReadTool
+    return FileReadTool()
+
+
+def _guarded(tool, provider):
+    """Put the result cache and the provider's rate limit in front of `tool`."""
+    cache = get_tool_cache()
+    if cache is None and get_limiter(provider) is None:
+        return tool
+    return cached_tool(tool, cache, rate_limit=provider)
+
+
+@lru_cache(maxsize=None)
+def _default_search_tool():
+    from crewai_tools import SerperDevTool
+    return _guarded(SerperDevTool(api_key=os.environ.get("SERPER_API_KEY")), 'serper')
 
-# Initialize tools
-docs_tool = DirectoryReadTool(directory='./company_docs')
-file_tool = FileReadTool()
-search_tool = SerperDevTool(api_key=os.environ.get("SERPER_API_KEY"))
-web_rag_tool = WebsiteSearchTool()
+
+@lru_cache(maxsize=None)
+def _default_web_rag_tool():
+    # Pages already embedded and unchanged are searched from the page index
+    index = get_page_index()
+    if index is not None:
+        return _guarded(build_website_search_tool(index), 'website')
+    from crewai_tools import WebsiteSearchTool
+    return _guarded(WebsiteSearchTool(), 'website')
+
+
+def get_search_tool():
+    if 'search' in _tool_overrides:
+        return _tool_overrides['search']
+    cassette = get_cassette()
+    if cassette is not None:
+        from crewai_tools import SerperDevTool
+        return cassette.tool(SerperDevTool, _default_search_tool)
+    return _default_search_tool()
+
+
+def get_web_rag_tool():
+    if 'web_rag' in _tool_overrides:
+        return _tool_overrides['web_rag']
+    cassette = get_cassette()
+    if cassette is not None:
+        from crewai_tools import WebsiteSearchTool
+        return cassette.tool(WebsiteSearchTool, _default_web_rag_tool)
+    return _default_web_rag_tool()
 
 
 @CrewBase
@@ -40,11 +113,22 @@ class Marketcompare():
     agents: List[BaseAgent]
     tasks: List[Task]
 
+    def __init__(self, progress: Optional[RunProgress] = None, report_file: Optional[str] = REPORT_FILE):
+        # Optional event log that receives step, task and LLM events of the run
+        self.progress = progress
+        # None keeps the final report off disk (concurrent batch runs would share the file)
+        self.report_file = report_file
+
+    def _agent_llm(self, name: str) -> LLM:
+        """Build the cached LLM for an agent using its configured temperature"""
+        return build_llm(self.agents_config[name].get('temperature')) # type: ignore[index]
+
     # Manager agent that orchestrates the entire process
     @agent
     def manager(self) -> Agent:
         return Agent(
             config=self.agents_config['manager'], # type: ignore[index]
+            llm=self._agent_llm('manager'),
             verbose=True
         )
 
@@ -53,6 +137,7 @@ class Marketcompare():
     def internal_data_agent(self) -> Agent:
         return Agent(
             config=self.agents_config['internal_data_agent'], # type: ignore[index]
+            llm=self._agent_llm('internal_data_agent'),
             verbose=True
         )
 
@@ -61,7 +146,8 @@ class Marketcompare():
     def market_research_agent(self) -> Agent:
         return Agent(
             config=self.agents_config['market_research_agent'], # type: ignore[index]
-            tools=[search_tool, web_rag_tool],
+            llm=self._agent_llm('market_research_agent'),
+            tools=[get_search_tool(), get_web_rag_tool()],
             verbose=True
         )
 
@@ -70,7 +156,8 @@ class Marketcompare():
     def competitor_agent(self) -> Agent:
         return Agent(
             config=self.agents_config['competitor_agent'], # type: ignore[index]
-            tools=[search_tool, web_rag_tool],
+            llm=self._agent_llm('competitor_agent'),
+            tools=[get_search_tool(), get_web_rag_tool()],
             verbose=True
         )
 
@@ -79,6 +166,7 @@ class Marketcompare():
     def data_synthesizer(self) -> Agent:
         return Agent(
             config=self.agents_config['data_synthesizer'], # type: ignore[index]
+            llm=self._agent_llm('data_synthesizer'),
             verbose=True
         )
 
@@ -87,13 +175,14 @@ class Marketcompare():
     def recommendation_agent(self) -> Agent:
         return Agent(
             config=self.agents_config['recommendation_agent'], # type: ignore[index]
+            llm=self._agent_llm('recommendation_agent'),
             verbose=True
         )
 
     # Initial task for the Manager to set up the analysis
     @task
     def init_task(self) -> Task:
-        return Task(
+        return CachedTask(
             config=self.tasks_config['init_task'], # type: ignore[index]
             output_pydantic=InitTaskOutput
         )
@@ -101,7 +190,7 @@ class Marketcompare():
     # Task for Internal Data Agent to analyze company documents
     @task
     def internal_data_task(self) -> Task:
-        return Task(
+        return CachedTask(
             config=self.tasks_config['internal_data_task'], # type: ignore[index]
             context=[self.init_task()],
             output_pydantic=InternalDataOutput
@@ -110,25 +199,27 @@ class Marketcompare():
     # Task for Market Research Agent to gather market trends and data
     @task
     def market_research_task(self) -> Task:
-        return Task(
+        return CachedTask(
             config=self.tasks_config['market_research_task'], # type: ignore[index]
             context=[self.init_task()],
-            output_pydantic=MarketResearchOutput
+            output_pydantic=MarketResearchOutput,
+            cache_ttl_hours=RESEARCH_TTL_HOURS
         )
 
-    # Task for Competitor Agent to analyze competitors
+    # Task for Competitor Agent to analyze competitors (fresh stored intelligence is reused)
     @task
     def competitor_analysis_task(self) -> Task:
-        return Task(
+        return CompetitorAnalysisTask(
             config=self.tasks_config['competitor_analysis_task'], # type: ignore[index]
             context=[self.init_task()],
-            output_pydantic=CompetitorAnalysisOutput
+            output_pydantic=CompetitorAnalysisOutput,
+            cache_ttl_hours=RESEARCH_TTL_HOURS
         )
 
     # Task for Data Synthesizer to combine all research data
     @task
     def data_synthesis_task(self) -> Task:
-        return Task(
+        return CachedTask(
             config=self.tasks_config['data_synthesis_task'], # type: ignore[index]
             context=[self.internal_data_task(), self.market_research_task(), self.competitor_analysis_task()],
             output_pydantic=DataSynthesisOutput
@@ -137,7 +228,7 @@ class Marketcompare():
     # Task for Recommendation Agent to generate recommendations
     @task
     def recommendation_task(self) -> Task:
-        return Task(
+        return CachedTask(
             config=self.tasks_config['recommendation_task'], # type: ignore[index]
             context=[self.data_synthesis_task()],
             output_pydantic=RecommendationOutput
@@ -146,16 +237,20 @@ class Marketcompare():
     # Final task for Manager to assemble the complete report
     @task
     def final_report_task(self) -> Task:
-        return Task(
+        return CachedTask(
             config=self.tasks_config['final_report_task'], # type: ignore[index]
             context=[self.data_synthesis_task(), self.recommendation_task()],
-            output_file='market_comparison_report.json',
+            output_file=self.report_file,
             output_pydantic=FinalReportOutput
         )
 
     @crew
     def crew(self) -> Crew:
-        """Creates the MarketCompare crew with sequential process"""
+        """Creates the MarketCompare crew.
+
+        Set MARKETCOMPARE_EXECUTION_MODE=dag to schedule the tasks from their
+        context dependencies instead of running them through the manager.
+        """
 
         # Load environment variables if using dotenv
         try:
@@ -164,11 +259,28 @@ class Marketcompare():
         except ImportError:
             pass
 
+        callbacks = {}
+        if self.progress is not None:
+            callbacks = {'step_callback': self.progress.step, 'task_callback': self.progress.task_finished}
+            for task_instance in self.tasks:
+                task_instance.progress = self.progress
+            for agent_instance in self.agents:
+                agent_instance.llm.progress = self.progress
+
+        if get_execution_mode() == DAG_MODE:
+            # Independent research tasks fan out in parallel and are joined
+            # before data_synthesis_task; each task runs on its own agent.
+            return Crew(
+                agents=self.agents,
+                tasks=apply_dag_schedule(self.tasks),
+                process=Process.sequential,
+                verbose=True,
+                **callbacks,
+            )
+
         # Configure LLM
-        openai_llm = LLM(
-            model="gpt-4o-mini",
-            api_key=os.getenv("OPENAI_API_KEY")
-        )
+        openai_llm = build_llm()
+        openai_llm.progress = self.progress
 
         return Crew(
             agents=self.agents,
@@ -176,17 +288,16 @@ class Marketcompare():
             process=Process.hierarchical,
             manager_llm=openai_llm,
             verbose=True,
+            **callbacks,
         )
 
     def before_kickoff(self, inputs):
         """Prepare environment before crew execution"""
-        global docs_tool, file_tool
-
         # Initialize using directory path string if provided
         if 'company_docs_dir' in inputs and inputs['company_docs_dir']:
             try:
                 directory_path = str(inputs['company_docs_dir'])
-                docs_tool = DirectoryReadTool(directory=directory_path)
+                get_docs_tool(directory_path)
                 print(f"DirectoryReadTool initialized with: {directory_path}")
             except Exception as e:
                 print(f"Error initializing DirectoryReadTool: {e}")
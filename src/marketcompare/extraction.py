@@ -0,0 +1,263 @@
+"""Extract the final report JSON from whatever text the model produced.
+
+`find_json_object` locates the first JSON object in arbitrary LLM output
+(leading prose, code fences, trailing commentary): the text is repaired in
+one linear pass that records where every object starts and ends, and the
+first object that parses wins. Repaired defects: trailing commas, //
+comments, single or curly quotes, Python literals (True/False/None), raw
+newlines in strings and output cut off before the closing brackets.
+
+`extract_report` tries, in order: the repaired raw text validated against
+FinalReportOutput, the crew's structured pydantic output, and, only if
+both fail, one re-ask of the model to turn the raw text into valid JSON
+(MARKETCOMPARE_EXTRACTION_REASK=off skips it). JSON that parses but does
+not match the schema is still returned when nothing better is found. Each
+avoided failure saves a full crew re-run.
+"""
+import json
+import re
+
+from .cache import env_flag
+from .enhanced_models import FinalReportOutput
+
+_CLOSERS = {"{": "}", "[": "]"}
+_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_OPEN_QUOTES = {'"': '"', "'": "'", "“": "”"}
+_OBJECT_START = re.compile(r"\{[ \t\n\r]*")
+# A `{` that the earlier scans read inside a string needs a scan of its own;
+# bounds those re-reads on output full of quoted braces
+_MAX_RESCANS = 50
+
+
+class ExtractionError(ValueError):
+    """Raised when no valid report can be extracted from the crew output."""
+
+
+def _strip_trailing_comma(out):
+    end = len(out)
+    while end and out[end - 1].isspace():
+        end -= 1
+    if end and out[end - 1] == ",":
+        del out[end - 1:]
+
+
+def find_json_object(text):
+    """Return the first JSON object in `text` that parses once repaired, or None if there is none.
+
+    When no candidate parses, the repaired first one is returned so that the
+    caller reports its parse error.
+    """
+    decoder = json.JSONDecoder()
+    objects = {}  # text position of a `{` -> (scan, start, end) of its repaired object
+    top_level = set()
+    first = None
+    rescans = 0
+    start = text.find("{")
+    while start >= 0:
+        if start not in objects:
+            # Read inside a string or comment by the earlier scans
+            if objects and rescans == _MAX_RESCANS:
+                break
+            rescans += bool(objects)
+            repaired, spans, tops = _scan(text, start, top_level)
+            top_level.update(tops)
+            scan = [repaired, 0, 0]  # repaired text, start and error position of its last failed object
+            objects.update((pos, (scan, a, b)) for pos, (a, b) in spans.items())
+        scan, a, b = objects[start]
+        repaired, failed_at, error_at = scan
+        # An object nested in the last failed one fails at the same position:
+        # the parser read it as a value up to there
+        if not failed_at < a < error_at < b:
+            error = _error_position(decoder, repaired, a, b)
+            if error is None:
+                return repaired[a:b]
+            scan[1:] = a, error
+        first = first if first is not None else repaired[a:b]
+        start = text.find("{", start + 1)
+    return first
+
+
+def _error_position(decoder, text, start, end):
+    """Return where the object `text[start:end]` fails to parse, or None if it parses."""
+    # Most stray braces fail on their first key; skip JSONDecodeError for
+    # those, as it counts the lines of all the text before the error
+    key = _OBJECT_START.match(text, start).end()
+    if text[key:key + 1] not in ('"', "}"):
+        return key
+    try:
+        return None if decoder.raw_decode(text, start)[1] == end else end
+    except json.JSONDecodeError as e:
+        return e.pos
+
+
+def _scan(text, start, stop=()):
+    """Repair the objects of `text` from the `{` at `start` in one pass.
+
+    Returns the repaired text, the {text position: (start, end)} spans in it
+    of the objects opening outside strings (a cut-off object ends with the
+    closers appended for it) and the text positions of the top-level ones.
+    Text between top-level objects is skipped; the scan stops at a top-level
+    `{` in `stop`, whose objects are already known.
+    """
+    out = []
+    stack = []
+    opens = []  # (text position or None for arrays, index in out) of the open containers
+    spans = {}
+    tops = [start]
+    quote = None  # closing character of the string being read
+    i, n = start, len(text)
+    while i < n:
+        char = text[i]
+        if quote is not None:
+            if char == "\\" and i + 1 < n:
+                # \' is not a JSON escape; the quote needs none inside "..."
+                out.append("'" if text[i + 1] == "'" else text[i:i + 2])
+                i += 2
+                continue
+            if char == quote:
+                out.append('"')
+                quote = None
+            elif char == '"':
+                out.append('\\"')  # inside a single- or curly-quoted string
+            elif char == "\n":
+                out.append("\\n")
+            elif char == "\t":
+                out.append("\\t")
+            else:
+                out.append(char)
+            i += 1
+            continue
+
+        if char in _OPEN_QUOTES:
+            quote = _OPEN_QUOTES[char]
+            out.append('"')
+        elif char in _CLOSERS:
+            stack.append(_CLOSERS[char])
+            opens.append((i if char == "{" else None, len(out)))
+            out.append(char)
+        elif char in "}]":
+            _strip_trailing_comma(out)
+            out.append(char)
+            if stack and stack[-1] == char:
+                stack.pop()
+                pos, index = opens.pop()
+                if pos is not None:
+                    spans[pos] = (index, len(out))
+            if not stack:
+                i = text.find("{", i + 1)
+                if i < 0 or i in stop:
+                    break
+                tops.append(i)
+                continue
+        elif char == "/" and text.startswith("//", i):
+            newline = text.find("\n", i)
+            i = n if newline < 0 else newline
+            continue
+        elif char.isalpha():
+            end = i
+            while end < n and (text[end].isalnum() or text[end] == "_"):
+                end += 1
+            word = text[i:end]
+            out.append(_LITERALS.get(word, word))
+            i = end
+            continue
+        else:
+            out.append(char)
+        i += 1
+
+    if stack:
+        # Cut off: close the open string and containers
+        if quote is not None:
+            out.append('"')
+        _strip_trailing_comma(out)
+        if "".join(out[-8:]).rstrip().endswith(":"):
+            out.append("null")
+        cut = len(out)
+        out.extend(reversed(stack))
+        for depth, (pos, index) in enumerate(opens):
+            if pos is not None:
+                spans[pos] = (index, cut + len(stack) - depth)
+
+    offsets = [0]
+    for piece in out:
+        offsets.append(offsets[-1] + len(piece))
+    spans = {pos: (offsets[a], offsets[b]) for pos, (a, b) in spans.items()}
+    return "".join(out), spans, tops
+
+
+def parse_report_json(text):
+    """Parse the first JSON object in `text` into a dict; raises ExtractionError."""
+    candidate = find_json_object(text or "")
+    if candidate is None:
+        raise ExtractionError("No JSON object found in the model output")
+    try:
+        data = json.loads(candidate)
+    except json.JSONDecodeError as e:
+        raise ExtractionError(f"Unrepairable JSON in the model output: {e}")
+    if not isinstance(data, dict):
+        raise ExtractionError("Model output JSON is not an object")
+    return data
+
+
+def validate_report(data):
+    """Raise ExtractionError unless `data` matches FinalReportOutput."""
+    try:
+        FinalReportOutput.model_validate(data)
+    except Exception as e:
+        raise ExtractionError(f"Report does not match FinalReportOutput: {e}")
+    return data
+
+
+def reask_model(raw, error):
+    """Ask the model once to turn `raw` into a valid report JSON object; returns its answer."""
+    from .llm import build_llm
+
+    schema = json.dumps(FinalReportOutput.model_json_schema())
+    return build_llm(temperature=0).call([
+        {"role": "system", "content": "You convert text into one JSON object. Reply with the JSON object only."},
+        {"role": "user", "content": (
+            f"The following report could not be used ({error}). Rewrite it as a single JSON object "
+            f"matching this JSON schema, keeping all of its content:\n{schema}\n\nReport:\n{raw}"
+        )},
+    ])
+
+
+def extract_report(result, reask=reask_model):
+    """Return the final report of a crew result as a dict.
+
+    `result` is a CrewOutput, a FinalReportOutput or a dict. `reask(raw,
+    error)` is called as the last resort (pass None to never call the model).
+    """
+    if isinstance(result, FinalReportOutput):
+        return result.model_dump(by_alias=True)
+    raw = result.get("raw") if isinstance(result, dict) else getattr(result, "raw", None)
+    if isinstance(result, dict) and raw is None:
+        return result
+    if isinstance(raw, dict):
+        return raw
+
+    error = "the crew output is empty"
+    parsed = None
+    if raw and raw.strip():
+        try:
+            parsed = parse_report_json(raw)
+            return validate_report(parsed)
+        except ExtractionError as e:
+            error = str(e)
+            print(f"⚠️ {error}; falling back to the structured output")
+
+    structured = result.get("pydantic") if isinstance(result, dict) else getattr(result, "pydantic", None)
+    if isinstance(structured, FinalReportOutput):
+        return structured.model_dump(by_alias=True)
+
+    if reask is not None and raw and raw.strip() and env_flag("MARKETCOMPARE_EXTRACTION_REASK"):
+        print("🔁 Asking the model to reformat the report as JSON")
+        try:
+            return validate_report(parse_report_json(reask(raw, error)))
+        except Exception as e:
+            error = f"{error}; re-ask failed: {e}"
+    if parsed is not None:
+        # Off-schema but usable: store what the model produced, as before
+        print(f"⚠️ Using the report JSON as parsed: {error}")
+        return parsed
+    raise ExtractionError(f"Could not extract the final report: {error}")
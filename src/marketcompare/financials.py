@@ -0,0 +1,129 @@
+import re
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+# Input keys of the statements parsed deterministically instead of by the LLM
+FINANCIAL_STATEMENT_KEYS = ("income_statement_2024", "balance_sheet_2024", "cash_flow_statement_2024")
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.*)$")
+# "Label: $1,250,000", "Label: ($85,000)", "Label: 79.0%", "Label: 500,000"; the
+# label is greedy so colons inside it ("Par Value $0.01; ...):") are kept.
+_LINE_ITEM = re.compile(
+    r"^(?P<label>.+):\s*(?P<negative>\()?\s*(?P<currency>\$)?\s*(?P<sign>-)?(?P<number>\d[\d,]*(?:\.\d+)?)\s*(?P<percent>%)?\s*\)?$"
+)
+_SKIPPED_SECTIONS = ("notes",)
+
+
+class FinancialLineItem(BaseModel):
+    """One numeric line of a financial statement with its source line."""
+    statement: str = Field(..., description="Statement title, e.g. 'Income Statement 2024'")
+    section: str = Field(default="", description="Heading path inside the statement")
+    label: str = Field(..., description="Line label as written in the statement")
+    value: float = Field(..., description="Numeric value; parenthesised amounts are negative")
+    unit: str = Field(..., description="'USD', '%' or 'count'")
+    is_total: bool = Field(default=False, description="Whether the line is a total or subtotal")
+    line: int = Field(..., description="1-based line number in the source document")
+
+
+class FinancialStatement(BaseModel):
+    """Typed records extracted from one statement document."""
+    title: str = Field(..., description="Statement title")
+    items: List[FinancialLineItem] = Field(default_factory=list, description="Parsed numeric lines")
+
+    def find(self, label: str) -> Optional[FinancialLineItem]:
+        """Return the first line item whose label matches (case-insensitive)."""
+        wanted = label.strip().lower()
+        return next((item for item in self.items if item.label.lower() == wanted), None)
+
+
+def _clean(text: str) -> str:
+    return text.strip().strip("*").strip()
+
+
+def parse_statement(title: str, text: str) -> FinancialStatement:
+    """Parse a 'Label: $amount' statement into typed line items.
+
+    Markdown headings give the section path (a heading can carry a value
+    itself, e.g. '## Gross Profit: $2,093,500'), bold lines and labels
+    starting with 'Total' are marked as totals, and the 'Notes' section is
+    skipped because it is prose.
+    """
+    statement = FinancialStatement(title=title)
+    headings = []  # (depth, title)
+
+    for line_number, raw_line in enumerate((text or "").splitlines(), start=1):
+        line = raw_line.strip()
+        if not line:
+            continue
+        depth = 0
+        heading = _HEADING.match(line)
+        if heading:
+            depth = len(heading.group(1))
+            line = heading.group(2)
+
+        is_bold = line.startswith("**") and line.endswith("**")
+        match = _LINE_ITEM.match(_clean(line))
+        if depth and not match:
+            headings = [(d, name) for d, name in headings if d < depth]
+            if depth > 1:
+                headings.append((depth, _clean(line).rstrip(":")))
+            continue
+        if not match or any(name.lower().startswith(_SKIPPED_SECTIONS) for _, name in headings):
+            continue
+
+        label = _clean(match.group("label"))
+        value = float(match.group("number").replace(",", ""))
+        if match.group("negative") or match.group("sign"):
+            value = -value
+        unit = "%" if match.group("percent") else "USD" if match.group("currency") else "count"
+        if depth:
+            # Valued heading: a top-level figure of its own section
+            headings = [(d, name) for d, name in headings if d < depth]
+        statement.items.append(FinancialLineItem(
+            statement=title,
+            section=" > ".join(name for _, name in headings),
+            label=label,
+            value=value,
+            unit=unit,
+            is_total=is_bold or label.lower().startswith("total") or bool(depth),
+            line=line_number,
+        ))
+    return statement
+
+
+def format_value(item: FinancialLineItem) -> str:
+    if item.unit == "%":
+        return f"{item.value:g}%"
+    if item.unit == "USD":
+        amount = f"${abs(item.value):,.2f}".replace(".00", "")
+        return f"({amount})" if item.value < 0 else amount
+    return f"{item.value:,.0f}" if item.value.is_integer() else f"{item.value:,}"
+
+
+def format_financial_context(statements: List[FinancialStatement]) -> str:
+    """Render statements as compact, line-referenced context for a prompt.
+
+    One line per section, e.g.
+    'Income Statement 2024 | Revenue: Subscription Revenue - ProjectFlow $1,855,000 [L6]; ...'
+    with totals marked by '='.
+    """
+    lines = []
+    for statement in statements:
+        sections: Dict[str, List[str]] = {}
+        for item in statement.items:
+            marker = "=" if item.is_total else ""
+            sections.setdefault(item.section, []).append(f"{marker}{item.label} {format_value(item)} [L{item.line}]")
+        for section, entries in sections.items():
+            prefix = f"{statement.title} | {section}" if section else statement.title
+            lines.append(f"{prefix}: " + "; ".join(entries))
+    return "\n".join(lines)
+
+
+def parse_financial_statements(documents: Dict[str, str]) -> List[FinancialStatement]:
+    """Parse every financial statement present in `documents` (input key -> text)."""
+    return [
+        parse_statement(key.replace("_", " ").title(), documents[key])
+        for key in FINANCIAL_STATEMENT_KEYS
+        if documents.get(key)
+    ]
@@ -0,0 +1,84 @@
+"""Measure the cold import time of the API entry point against a budget.
+
+Usage: import_budget [target] [--budget-ms N]
+
+`target` is a module name or a path to a .py file (default: api/index.py).
+The import runs in a fresh interpreter with `-X importtime`; the command
+prints the slowest imports and exits non-zero when the total exceeds the
+budget (MARKETCOMPARE_IMPORT_BUDGET_MS, default 1500 ms).
+"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+DEFAULT_TARGET = Path(__file__).resolve().parents[2] / "api" / "index.py"
+DEFAULT_BUDGET_MS = 1500
+
+
+def _import_snippet(target):
+    if str(target).endswith(".py"):
+        return (
+            "import importlib.util;"
+            f"spec = importlib.util.spec_from_file_location('import_budget_target', {str(target)!r});"
+            "module = importlib.util.module_from_spec(spec);"
+            "spec.loader.exec_module(module)"
+        )
+    return f"import {target}"
+
+
+def measure_import(target=DEFAULT_TARGET):
+    """Import `target` in a fresh interpreter.
+
+    Returns `(total_ms, rows)` where rows are `(cumulative_ms, module)` for
+    every module imported along the way, slowest first.
+    """
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    src_dir = str(Path(__file__).resolve().parents[1])
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [src_dir, env.get("PYTHONPATH")]))
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _import_snippet(target)],
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {target} failed:\n{completed.stderr[-2000:]}")
+
+    rows = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, module = line.split("|", 2)
+        # Nested imports are indented two spaces per level after the separator
+        rows.append((int(cumulative_us) / 1000.0, module[1:].rstrip()))
+
+    # Top-level imports are the ones without indentation
+    total_ms = sum(ms for ms, module in rows if not module.startswith("  "))
+    rows.sort(reverse=True)
+    return total_ms, rows
+
+
+def main():
+    args = sys.argv[1:]
+    budget_ms = float(os.getenv("MARKETCOMPARE_IMPORT_BUDGET_MS", DEFAULT_BUDGET_MS))
+    if "--budget-ms" in args:
+        index = args.index("--budget-ms")
+        budget_ms = float(args[index + 1])
+        del args[index:index + 2]
+    target = args[0] if args else DEFAULT_TARGET
+
+    total_ms, rows = measure_import(target)
+    print(f"Import of {target}: {total_ms:.0f} ms (budget {budget_ms:.0f} ms)")
+    print("Slowest top-level imports:")
+    for ms, module in [row for row in rows if not row[1].startswith("  ")][:10]:
+        print(f"  {ms:8.1f} ms  {module.strip()}")
+
+    if total_ms > budget_ms:
+        print("❌ Import time budget exceeded")
+        sys.exit(1)
+    print("✅ Import time within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from .metrics import attach_metrics
+from .progress import RunProgress
+
+PENDING = "pending"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class JobQueueFull(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+
+class Job:
+    """A single background crew run, its timing and its progress events."""
+
+    def __init__(self, job_id):
+        self.id = job_id
+        self.progress = RunProgress(job_id)
+        self.metrics = attach_metrics(self.progress)
+        self.status = PENDING
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+
+    @property
+    def done(self):
+        return self.status in (SUCCEEDED, FAILED, CANCELLED)
+
+    def to_dict(self):
+        def iso(ts):
+            return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(ts)) if ts else None
+
+        end = self.finished_at or time.time()
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "created_at": iso(self.created_at),
+            "started_at": iso(self.started_at),
+            "finished_at": iso(self.finished_at),
+            "queued_seconds": round((self.started_at or end) - self.created_at, 3),
+            "run_seconds": round(end - self.started_at, 3) if self.started_at else None,
+            "report_id": (self.result or {}).get("_id") if isinstance(self.result, dict) else None,
+            "error": self.error,
+        }
+
+
+def _run_crew(progress):
+    from .main import run
+    return run(progress=progress)
+
+
+class JobManager:
+    """Runs crew jobs on a bounded worker pool with a bounded queue.
+
+    At most `max_workers` runs execute at once and at most `max_queue` more
+    wait for a worker; further submissions raise JobQueueFull. The last
+    `history` finished jobs are kept for status and result lookups.
+    """
+
+    def __init__(self, runner=_run_crew, max_workers=2, max_queue=8, history=100):
+        self.runner = runner
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.history = history
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="crew-job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def active_count(self):
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if not job.done)
+
+    def submit(self):
+        with self._lock:
+            active = sum(1 for job in self._jobs.values() if not job.done)
+            if active >= self.max_workers + self.max_queue:
+                raise JobQueueFull(f"Job queue is full ({active} jobs pending or running)")
+            job = Job(uuid.uuid4().hex)
+            self._jobs[job.id] = job
+            self._prune()
+        self._executor.submit(self._execute, job)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """Ask a job to stop; queued jobs never start, running ones stop at the next step."""
+        job = self.get(job_id)
+        if job is not None and not job.done:
+            job.progress.cancel()
+        return job
+
+    def _execute(self, job):
+        if job.progress.cancelled:
+            job.status = CANCELLED
+            job.finished_at = time.time()
+            job.progress.close(job.status)
+            return
+        job.status = RUNNING
+        job.started_at = time.time()
+        job.progress.emit("run_started")
+        try:
+            job.result = self.runner(job.progress)
+            job.status = SUCCEEDED
+        except Exception as e:
+            job.error = str(e)
+            job.status = CANCELLED if job.progress.cancelled else FAILED
+        finally:
+            job.finished_at = time.time()
+            job.progress.close(job.status)
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self._jobs[job_id]
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager():
+    """Return the process-wide JobManager configured from the environment."""
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = JobManager(
+                    max_workers=int(os.getenv("MARKETCOMPARE_JOB_WORKERS", "2")),
+                    max_queue=int(os.getenv("MARKETCOMPARE_JOB_QUEUE_SIZE", "8")),
+                    history=int(os.getenv("MARKETCOMPARE_JOB_HISTORY", "100")),
+                )
+    return _manager
@@ -0,0 +1,191 @@
+import os
+import threading
+import time
+
+from crewai import LLM
+from litellm.integrations.custom_logger import CustomLogger
+
+from .cache import DiskCache, cache_dir, env_flag, make_key
+from .cassette import get_cassette
+from .progress import estimate_tokens
+from .ratelimit import acquire as rate_limit, llm_provider
+
+DEFAULT_MODEL = "gpt-4o-mini"
+
+_llm_cache = None
+_llm_cache_lock = threading.Lock()
+
+# Usage of the completion the current thread made last (see _UsageCapture)
+_usage = threading.local()
+
+
+def get_llm_cache():
+    """Return the shared completion cache, or None when it is bypassed.
+
+    Set MARKETCOMPARE_LLM_CACHE=off to bypass it and MARKETCOMPARE_LLM_CACHE_MAX_MB
+    to bound its size on disk.
+    """
+    global _llm_cache
+    if not env_flag("MARKETCOMPARE_LLM_CACHE"):
+        return None
+    if _llm_cache is None:
+        with _llm_cache_lock:
+            if _llm_cache is None:
+                max_mb = int(os.getenv("MARKETCOMPARE_LLM_CACHE_MAX_MB", "512"))
+                _llm_cache = DiskCache(cache_dir() / "llm_completions.sqlite3", max_bytes=max_mb * 1024 * 1024)
+    return _llm_cache
+
+
+def _schema_of(response_format):
+    if response_format is None:
+        return None
+    if hasattr(response_format, "model_json_schema"):
+        return response_format.model_json_schema()
+    return response_format
+
+
+class _UsageCapture(CustomLogger):
+    """Callback receiving the `usage` crewAI reads from the provider's response.
+
+    crewAI hands it `{"usage": ...}` synchronously in the calling thread;
+    litellm's own (asynchronous) logging calls with the full response object
+    are ignored so concurrent calls cannot leak into each other.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.usage = None
+
+    def log_success_event(self, kwargs, response_obj, start_time, end_time):
+        if isinstance(response_obj, dict) and response_obj.get("usage"):
+            self.usage = response_obj["usage"]
+
+
+def _usage_tokens(usage):
+    """(prompt, completion) tokens of a litellm Usage object or dict, or None."""
+    get = usage.get if isinstance(usage, dict) else lambda name: getattr(usage, name, None)
+    prompt, completion = get("prompt_tokens"), get("completion_tokens")
+    if prompt is None and completion is None:
+        return None
+    return prompt or 0, completion or 0
+
+
+class CachedLLM(LLM):
+    """crewAI LLM whose text completions are served from a persistent cache.
+
+    The cache key hashes the model, sampling parameters, messages and output
+    schema, so any change to a prompt produces a fresh completion. Calls that
+    pass native tool schemas are never cached because they execute tools.
+    While a cassette is active (see cassette.py) the cache is bypassed and
+    completions are recorded or replayed instead.
+    """
+
+    def cache_key(self, messages):
+        return make_key(
+            self.model,
+            self.temperature,
+            self.top_p,
+            self.seed,
+            sorted(self.stop or []),
+            messages,
+            _schema_of(self.response_format),
+        )
+
+    # RunProgress receiving an llm_call event per completion (set by the crew)
+    progress = None
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, **kwargs):
+        if self.progress is not None:
+            self.progress.check_cancelled()
+        started = time.monotonic()
+        cassette = get_cassette()
+        if cassette is not None:
+            return self._cassette_call(cassette, messages, started, tools=tools, callbacks=callbacks,
+                                       available_functions=available_functions, **kwargs)
+        cache = get_llm_cache()
+        if cache is None or tools or available_functions:
+            result = self._complete(messages, started, tools=tools, callbacks=callbacks,
+                                    available_functions=available_functions, **kwargs)
+            self._report(messages, result, started)
+            return result
+
+        key = self.cache_key(messages)
+        cached = cache.get(key)
+        if cached is not None:
+            result = cached.decode("utf-8")
+            self._report(messages, result, started, cached=True)
+            return result
+
+        result = self._complete(messages, started, tools=tools, callbacks=callbacks,
+                                available_functions=available_functions, **kwargs)
+        if isinstance(result, str) and result.strip():
+            cache.set(key, result.encode("utf-8"))
+        self._report(messages, result, started)
+        return result
+
+    def _cassette_call(self, cassette, messages, started, **kwargs):
+        """Replay the recorded completion, or complete and record it (bypasses the cache)."""
+        request_key = make_key(self.cache_key(messages), kwargs.get("tools"))
+        if cassette.replaying:
+            result = cassette.play("llm", request_key)
+        else:
+            result = self._complete(messages, started, **kwargs)
+            cassette.record("llm", request_key, {"model": self.model, "messages": messages}, result)
+        self._report(messages, result, started)
+        return result
+
+    def _complete(self, messages, started, **kwargs):
+        # Shared with every agent and concurrent run of this process (see ratelimit.py)
+        rate_limit(llm_provider(self.model))
+        capture = _UsageCapture()
+        kwargs["callbacks"] = [*(kwargs.get("callbacks") or []), capture]
+        try:
+            result = super().call(messages, **kwargs)
+            _usage.value = capture.usage
+            return result
+        except Exception as e:
+            # Reported so failed attempts that the agent retries show up in the metrics
+            if self.progress is not None:
+                self.progress.llm_error(self.model, e, time.monotonic() - started)
+            raise
+
+    def _report(self, messages, result, started, cached=False):
+        # Billed tokens from the provider's usage; re-tokenized only when it
+        # did not report any (cached, replayed or fake completions)
+        tokens = None if cached else _usage_tokens(getattr(_usage, "value", None) or {})
+        _usage.value = None
+        if self.progress is None:
+            return
+        estimated = tokens is None
+        if estimated:
+            tokens = (
+                estimate_tokens(self.model, messages=messages),
+                estimate_tokens(self.model, text=result if isinstance(result, str) else str(result)),
+            )
+        self.progress.llm_call(
+            model=self.model,
+            prompt_tokens=tokens[0],
+            completion_tokens=tokens[1],
+            duration=time.monotonic() - started,
+            cached=cached,
+            estimated=estimated,
+        )
+
+
+# Class instantiated by build_llm(); the offline benchmark swaps in a fake
+_llm_class = CachedLLM
+
+
+def set_llm_class(llm_class):
+    """Make build_llm() create `llm_class` (a CachedLLM subclass) instead."""
+    global _llm_class
+    _llm_class = llm_class
+
+
+def build_llm(temperature=None):
+    """Create the LLM used by every agent and the hierarchical manager."""
+    return _llm_class(
+        model=os.getenv("MARKETCOMPARE_LLM_MODEL", DEFAULT_MODEL),
+        api_key=os.getenv("OPENAI_API_KEY"),
+        temperature=temperature,
+    )
@@ -0,0 +1,139 @@
+import threading
+import time
+
+from .progress import RunProgress
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens):
+    """USD cost from litellm's price table; 0.0 for unknown models."""
+    try:
+        from litellm import cost_per_token
+        prompt_cost, completion_cost = cost_per_token(
+            model=model, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens
+        )
+        return prompt_cost + completion_cost
+    except Exception:
+        return 0.0
+
+
+def _empty_counters():
+    return {
+        "llm_calls": 0,
+        "cached_llm_calls": 0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "estimated_token_calls": 0,
+        "cost_usd": 0.0,
+        "llm_seconds": 0.0,
+        "tool_calls": 0,
+        "retries": 0,
+    }
+
+
+class RunMetrics:
+    """Per-task token, cost and latency accounting for one crew run.
+
+    Listens to the run's RunProgress events: llm_call events add tokens
+    (the provider's reported usage; calls where it had to be estimated are
+    counted in `estimated_token_calls`), cost and model time, tool_call events count tool use, llm_error events
+    and a task starting again (guardrail retry) count as retries, and
+    task_started/task_finished give each task's wall-clock time. Events
+    outside any task (the hierarchical manager) are booked under "_manager".
+    """
+
+    MANAGER = "_manager"
+
+    def __init__(self, progress):
+        self.run_id = progress.run_id
+        self._started = time.monotonic()
+        self._finished = None
+        self._tasks = {}
+        self._running = {}
+        self._lock = threading.Lock()
+        progress.subscribe(self.handle)
+
+    def _task(self, name):
+        name = name or self.MANAGER
+        if name not in self._tasks:
+            self._tasks[name] = {"agent": None, "elapsed_seconds": None, "cached_output": False, **_empty_counters()}
+        return self._tasks[name]
+
+    def handle(self, event):
+        handler = getattr(self, f"_on_{event['type']}", None)
+        if handler is not None:
+            with self._lock:
+                handler(event)
+
+    def _on_run_started(self, event):
+        # Jobs wait in the queue first; time the run itself
+        self._started = time.monotonic()
+
+    def _on_run_finished(self, event):
+        self._finished = time.monotonic()
+
+    def _on_task_started(self, event):
+        task = self._task(event["task"])
+        task["agent"] = event.get("agent")
+        if event["task"] in self._running or task["elapsed_seconds"] is not None:
+            task["retries"] += 1
+        self._running.setdefault(event["task"], time.monotonic())
+
+    def _on_task_finished(self, event):
+        task = self._task(event["task"])
+        started = self._running.pop(event["task"], None)
+        if started is not None:
+            task["elapsed_seconds"] = round(time.monotonic() - started, 3)
+        # A task reused from the task cache finishes without calling the LLM
+        task["cached_output"] = task["llm_calls"] == 0
+
+    def _on_llm_call(self, event):
+        task = self._task(event.get("task"))
+        task["llm_calls"] += 1
+        task["prompt_tokens"] += event.get("prompt_tokens") or 0
+        task["completion_tokens"] += event.get("completion_tokens") or 0
+        task["llm_seconds"] = round(task["llm_seconds"] + (event.get("duration") or 0), 3)
+        if event.get("estimated"):
+            task["estimated_token_calls"] += 1
+        if event.get("cached"):
+            task["cached_llm_calls"] += 1
+        else:
+            task["cost_usd"] += estimate_cost(
+                event.get("model"), event.get("prompt_tokens") or 0, event.get("completion_tokens") or 0
+            )
+
+    def _on_llm_error(self, event):
+        self._task(event.get("task"))["retries"] += 1
+
+    def _on_tool_call(self, event):
+        self._task(event.get("task"))["tool_calls"] += 1
+
+    def summary(self):
+        """JSON-safe per-run summary: totals plus one entry per task."""
+        with self._lock:
+            tasks = {name: dict(counters, cost_usd=round(counters["cost_usd"], 6))
+                     for name, counters in self._tasks.items()}
+        totals = _empty_counters()
+        for counters in tasks.values():
+            for key in totals:
+                totals[key] += counters[key]
+        totals["cost_usd"] = round(totals["cost_usd"], 6)
+        totals["llm_seconds"] = round(totals["llm_seconds"], 3)
+        totals["total_tokens"] = totals["prompt_tokens"] + totals["completion_tokens"]
+        totals["elapsed_seconds"] = round((self._finished or time.monotonic()) - self._started, 3)
+        return {"run_id": self.run_id, "totals": totals, "tasks": tasks}
+
+
+_attach_lock = threading.Lock()
+
+
+def attach_metrics(progress: RunProgress) -> RunMetrics:
+    """Return the RunMetrics collecting `progress`, creating it on first call.
+
+    Attach before the run starts: metrics only see events emitted afterwards.
+    """
+    with _attach_lock:
+        metrics = getattr(progress, "metrics", None)
+        if metrics is None:
+            metrics = RunMetrics(progress)
+            progress.metrics = metrics
+    return metrics
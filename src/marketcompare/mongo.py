@@ -0,0 +1,83 @@
+import atexit
+import os
+import threading
+
+# Credentials never live in the code: deployments set MONGODB_URI
+DEFAULT_MONGODB_URI = "mongodb://localhost:27017"
+DEFAULT_DB_NAME = "sample_db"
+
+# Environment variable -> MongoClient keyword for the pool and timeout settings
+_CLIENT_OPTIONS = {
+    "MONGO_MAX_POOL_SIZE": "maxPoolSize",
+    "MONGO_MIN_POOL_SIZE": "minPoolSize",
+    "MONGO_MAX_IDLE_TIME_MS": "maxIdleTimeMS",
+    "MONGO_CONNECT_TIMEOUT_MS": "connectTimeoutMS",
+    "MONGO_SOCKET_TIMEOUT_MS": "socketTimeoutMS",
+    "MONGO_SERVER_SELECTION_TIMEOUT_MS": "serverSelectionTimeoutMS",
+    "MONGO_WAIT_QUEUE_TIMEOUT_MS": "waitQueueTimeoutMS",
+}
+
+_clients = {}
+_lock = threading.Lock()
+
+
+def get_mongo_uri():
+    """Return the MongoDB connection string from MONGODB_URI (a local mongod if unset)."""
+    return os.getenv("MONGODB_URI", DEFAULT_MONGODB_URI)
+
+
+def get_db_name():
+    """Return the MongoDB database name configured in the environment."""
+    return os.getenv("DB_NAME", DEFAULT_DB_NAME)
+
+
+def client_options():
+    """Build MongoClient pool/timeout keyword arguments from the environment."""
+    options = {}
+    for env_name, option in _CLIENT_OPTIONS.items():
+        value = os.getenv(env_name)
+        if value:
+            options[option] = int(value)
+    return options
+
+
+def get_client(uri=None):
+    """Return the shared, pooled MongoClient for `uri` (created on first use).
+
+    MongoClient is thread-safe and keeps its own connection pool, so one
+    instance per connection string is shared by the whole process.
+    """
+    uri = uri or get_mongo_uri()
+    client = _clients.get(uri)
+    if client is not None:
+        return client
+    with _lock:
+        client = _clients.get(uri)
+        if client is None:
+            from pymongo import MongoClient  # imported on first connection
+            client = MongoClient(uri, **client_options())
+            _clients[uri] = client
+    return client
+
+
+def register_client(uri, client):
+    """Serve `client` for `uri` instead of connecting (e.g. a mongomock client)."""
+    with _lock:
+        _clients[uri] = client
+
+
+def get_database(db_name=None, uri=None):
+    """Return a database handle from the shared client."""
+    return get_client(uri)[db_name or get_db_name()]
+
+
+def close_clients():
+    """Close every shared client; later calls to get_client() reconnect."""
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
+
+
+atexit.register(close_clients)
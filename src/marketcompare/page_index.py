@@ -0,0 +1,259 @@
+"""Persistent embedding index of the web pages agents search.
+
+WebsiteSearchTool fetches, chunks and embeds a page into a fresh vector
+store every time an agent touches its URL. `IndexedWebsiteSearchTool`
+keeps the chunks and embeddings of each page in SQLite keyed by normalised
+URL and embedding model, with the page's content hash, instead:
+
+* a page checked within the revalidation window is queried directly,
+  without fetching it;
+* an older page is fetched again, and only re-embedded when its content
+  hash changed;
+* least recently used pages are evicted once the index exceeds its size
+  bound;
+* changing the embedding model re-embeds pages on their next use instead
+  of comparing vectors from different models.
+
+MARKETCOMPARE_PAGE_INDEX=off falls back to crewAI's WebsiteSearchTool.
+MARKETCOMPARE_PAGE_INDEX_MAX_MB (default 256),
+MARKETCOMPARE_PAGE_INDEX_REVALIDATE_HOURS (default 24) and
+MARKETCOMPARE_EMBEDDING_MODEL (default text-embedding-3-small) configure it.
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Type
+from urllib.parse import urlsplit, urlunsplit
+
+from pydantic import BaseModel, Field
+
+from .cache import cache_dir, env_flag
+from .retrieval import chunk_document
+
+DEFAULT_EMBEDDING_MODEL = "text-embedding-3-small"
+TOOL_NAME = "Search in a specific website"
+TOP_K = 5
+# Locks serialising the fetch/embed work per URL (a URL always maps to the same one)
+LOCK_STRIPES = 64
+
+_page_index = None
+_page_index_lock = threading.Lock()
+
+
+def page_text(html):
+    """Visible text of an HTML page, one paragraph per block element."""
+    try:
+        from bs4 import BeautifulSoup
+    except ImportError:
+        return re.sub(r"<[^>]+>", " ", html)
+    soup = BeautifulSoup(html, "html.parser")
+    for element in soup(["script", "style", "noscript", "svg", "header", "footer", "nav"]):
+        element.decompose()
+    lines = (line.strip() for line in soup.get_text("\n").splitlines())
+    return "\n\n".join(line for line in lines if line)
+
+
+def normalize_url(url):
+    """Identity of a page: scheme and host lowercased, fragment and trailing slash dropped."""
+    url = url.strip()
+    if "://" not in url:
+        url = f"https://{url}"
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/"), parts.query, ""))
+
+
+def fetch_page(url, timeout=20):
+    import requests
+
+    response = requests.get(url, timeout=timeout, headers={"User-Agent": "Mozilla/5.0 (marketcompare)"})
+    response.raise_for_status()
+    return page_text(response.text)
+
+
+def embed(texts, model=None):
+    """Embed `texts` with litellm; returns a float32 matrix with unit-length rows."""
+    import numpy as np
+    from litellm import embedding
+
+    response = embedding(model=model or os.getenv("MARKETCOMPARE_EMBEDDING_MODEL", DEFAULT_EMBEDDING_MODEL),
+                         input=list(texts))
+    vectors = np.array([item["embedding"] for item in response.data], dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+class PageIndex:
+    """Chunks and embeddings of web pages on SQLite, evicted by size (LRU).
+
+    Pages are keyed by normalised URL and embedding model, so vectors of
+    different models are never compared. Safe to share between threads;
+    `fetch` and `embed` are injectable so the index can be exercised offline.
+    """
+
+    def __init__(self, path, max_bytes=256 * 1024 * 1024, revalidate_seconds=24 * 3600,
+                 fetch=fetch_page, embed=embed, model=None):
+        self.max_bytes = max_bytes
+        self.revalidate_seconds = revalidate_seconds
+        self.fetch = fetch
+        self.embed = embed
+        self.model = model or os.getenv("MARKETCOMPARE_EMBEDDING_MODEL", DEFAULT_EMBEDDING_MODEL)
+        self.reused = 0
+        self.revalidated = 0
+        self.embedded = 0
+        self._lock = threading.Lock()
+        self._url_locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(pages)")]
+        if columns and "model" not in columns:
+            # Index written before pages were keyed by model: start over
+            self._conn.execute("DROP TABLE IF EXISTS chunks")
+            self._conn.execute("DROP TABLE pages")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " url TEXT NOT NULL,"
+            " model TEXT NOT NULL,"
+            " content_hash TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " checked_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL,"
+            " PRIMARY KEY (url, model))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            " url TEXT NOT NULL,"
+            " model TEXT NOT NULL,"
+            " position INTEGER NOT NULL,"
+            " text TEXT NOT NULL,"
+            " embedding BLOB NOT NULL,"
+            " PRIMARY KEY (url, model, position))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS pages_accessed_at ON pages (accessed_at)")
+
+    def _page(self, url):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT content_hash, checked_at FROM pages WHERE url = ? AND model = ?", (url, self.model)
+            ).fetchone()
+
+    def ensure(self, url):
+        """Make sure `url` is indexed and current; fetches and embeds only when needed."""
+        key = normalize_url(url)
+        # One thread per URL does the work; the others then find it indexed
+        with self._url_locks[hash(key) % LOCK_STRIPES]:
+            self._ensure(url, key)
+
+    def _ensure(self, url, key):
+        now = time.time()
+        row = self._page(key)
+        if row is not None and now - row[1] < self.revalidate_seconds:
+            self.reused += 1
+            return
+        text = self.fetch(url)
+        content_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        if row is not None and row[0] == content_hash:
+            with self._lock:
+                self._conn.execute("UPDATE pages SET checked_at = ? WHERE url = ? AND model = ?",
+                                   (now, key, self.model))
+            self.revalidated += 1
+            return
+
+        passages = chunk_document(key, text)
+        vectors = self.embed([passage.text for passage in passages], self.model) if passages else []
+        rows = [(key, self.model, i, passage.text, vector.astype("float32").tobytes())
+                for i, (passage, vector) in enumerate(zip(passages, vectors))]
+        size = sum(len(chunk.encode("utf-8")) + len(blob) for _, _, _, chunk, blob in rows)
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.execute("DELETE FROM chunks WHERE url = ? AND model = ?", (key, self.model))
+            self._conn.executemany(
+                "INSERT INTO chunks (url, model, position, text, embedding) VALUES (?, ?, ?, ?, ?)", rows
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (url, model, content_hash, size, checked_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, self.model, content_hash, size, now, now),
+            )
+            self._conn.execute("COMMIT")
+            self._evict(keep=(key, self.model))
+        self.embedded += 1
+
+    def search(self, url, query, top_k=TOP_K):
+        """Return the `top_k` chunks of `url` most similar to `query`."""
+        import numpy as np
+
+        self.ensure(url)
+        key = normalize_url(url)
+        with self._lock:
+            self._conn.execute("UPDATE pages SET accessed_at = ? WHERE url = ? AND model = ?",
+                               (time.time(), key, self.model))
+            rows = self._conn.execute(
+                "SELECT text, embedding FROM chunks WHERE url = ? AND model = ? ORDER BY position", (key, self.model)
+            ).fetchall()
+        if not rows:
+            return []
+        matrix = np.stack([np.frombuffer(blob, dtype=np.float32) for _, blob in rows])
+        scores = matrix @ self.embed([query], self.model)[0]
+        best = np.argsort(-scores)[:top_k]
+        return [rows[i][0] for i in sorted(best)]
+
+    def _evict(self, keep):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        pages = self._conn.execute("SELECT url, model, size FROM pages ORDER BY accessed_at ASC").fetchall()
+        for url, model, size in pages:
+            if total <= self.max_bytes:
+                break
+            if (url, model) == keep:
+                continue
+            self._conn.execute("DELETE FROM chunks WHERE url = ? AND model = ?", (url, model))
+            self._conn.execute("DELETE FROM pages WHERE url = ? AND model = ?", (url, model))
+            total -= size
+
+    def stats(self):
+        with self._lock:
+            pages, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages").fetchone()
+        return {"pages": pages, "bytes": size, "max_bytes": self.max_bytes,
+                "reused": self.reused, "revalidated": self.revalidated, "embedded": self.embedded}
+
+
+def get_page_index():
+    """Return the shared page index, or None when it is turned off."""
+    global _page_index
+    if not env_flag("MARKETCOMPARE_PAGE_INDEX"):
+        return None
+    if _page_index is None:
+        with _page_index_lock:
+            if _page_index is None:
+                max_mb = int(os.getenv("MARKETCOMPARE_PAGE_INDEX_MAX_MB", "256"))
+                revalidate_hours = float(os.getenv("MARKETCOMPARE_PAGE_INDEX_REVALIDATE_HOURS", "24"))
+                _page_index = PageIndex(cache_dir() / "page_index.sqlite3", max_bytes=max_mb * 1024 * 1024,
+                                        revalidate_seconds=revalidate_hours * 3600)
+    return _page_index
+
+
+class WebsiteSearchInput(BaseModel):
+    search_query: str = Field(..., description="Mandatory search query you want to use to search a specific website")
+    website: str = Field(..., description="Mandatory valid website URL you want to search on")
+
+
+def build_website_search_tool(index):
+    """WebsiteSearchTool stand-in answering from `index` (same name and arguments)."""
+    from crewai.tools import BaseTool
+
+    class IndexedWebsiteSearchTool(BaseTool):
+        name: str = TOOL_NAME
+        description: str = "A tool that can be used to semantic search a query from a specific URL content."
+        args_schema: Type[BaseModel] = WebsiteSearchInput
+
+        def _run(self, search_query: str, website: str) -> str:
+            chunks = index.search(website, search_query)
+            if not chunks:
+                return f"No content could be extracted from {website}"
+            return "Relevant Content:\n" + "\n\n".join(chunks)
+
+    return IndexedWebsiteSearchTool()
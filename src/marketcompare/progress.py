@@ -0,0 +1,163 @@
+import threading
+import time
+
+# Thread-local name of the task the current thread is executing. crewAI runs
+# async tasks on plain threads, so a contextvar would not reach them.
+_local = threading.local()
+
+
+class RunCancelled(Exception):
+    """Raised inside a run once a client has asked for it to be cancelled."""
+
+
+def current_task_name():
+    return getattr(_local, "task_name", None)
+
+
+def estimate_tokens(model, messages=None, text=None):
+    """Count tokens with litellm's tokenizer; 0 if it cannot be determined."""
+    try:
+        from litellm import token_counter
+        if messages is not None:
+            if isinstance(messages, str):
+                messages = [{"role": "user", "content": messages}]
+            return token_counter(model=model, messages=messages)
+        return token_counter(model=model, text=text or "")
+    except Exception:
+        return 0
+
+
+class RunProgress:
+    """Ordered log of structured events for one crew run.
+
+    Events come from the crew's step and task callbacks and from the task
+    and LLM wrappers. Readers follow the log with `iter_events`, which
+    blocks until new events arrive or the run is closed. Setting `cancelled`
+    makes the next task start, LLM call or agent step raise RunCancelled.
+    """
+
+    def __init__(self, run_id=None):
+        self.run_id = run_id
+        self.events = []
+        self.cancelled = False
+        self.closed = False
+        self._started = time.monotonic()
+        self._task_started = {}
+        self._condition = threading.Condition()
+        self._listeners = []
+        # RunMetrics collecting this run's events (see metrics.attach_metrics)
+        self.metrics = None
+
+    # -- event log ---------------------------------------------------------
+
+    def emit(self, event_type, **fields):
+        with self._condition:
+            event = {
+                "seq": len(self.events) + 1,
+                "type": event_type,
+                "timestamp": time.time(),
+                "elapsed": round(time.monotonic() - self._started, 3),
+                **fields,
+            }
+            self.events.append(event)
+            self._condition.notify_all()
+        for listener in list(self._listeners):
+            listener(event)
+        return event
+
+    def subscribe(self, listener):
+        """Call `listener(event)` for every event emitted from now on."""
+        self._listeners.append(listener)
+
+    def close(self, status):
+        self.emit("run_finished", status=status)
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+    def iter_events(self, after=0, heartbeat=15.0):
+        """Yield events with seq > `after` until the run is closed.
+
+        Yields None every `heartbeat` seconds without news so streaming
+        responses can keep the connection alive.
+        """
+        while True:
+            with self._condition:
+                if len(self.events) <= after and not self.closed:
+                    self._condition.wait(timeout=heartbeat)
+                pending = self.events[after:]
+                closed = self.closed
+            if pending:
+                for event in pending:
+                    yield event
+                after += len(pending)
+            elif closed:
+                return
+            else:
+                yield None
+
+    # -- cancellation ------------------------------------------------------
+
+    def cancel(self):
+        if not self.cancelled:
+            self.cancelled = True
+            self.emit("cancel_requested")
+
+    def check_cancelled(self):
+        if self.cancelled:
+            raise RunCancelled(f"Run {self.run_id} was cancelled")
+
+    # -- crew hooks --------------------------------------------------------
+
+    def task_started(self, task_name, agent_role=None):
+        self.check_cancelled()
+        _local.task_name = task_name
+        self._task_started[task_name] = time.monotonic()
+        self.emit("task_started", task=task_name, agent=agent_role)
+
+    def task_finished(self, output):
+        """Crew `task_callback`: receives the finished TaskOutput."""
+        task_name = getattr(output, "name", None) or current_task_name()
+        started = self._task_started.pop(task_name, None)
+        self.emit(
+            "task_finished",
+            task=task_name,
+            agent=getattr(output, "agent", None),
+            duration=round(time.monotonic() - started, 3) if started else None,
+        )
+
+    def step(self, step_output):
+        """Crew `step_callback`: receives each AgentAction / AgentFinish."""
+        self.check_cancelled()
+        tool = getattr(step_output, "tool", None)
+        if tool:
+            self.emit(
+                "tool_call",
+                task=current_task_name(),
+                tool=tool,
+                tool_input=str(getattr(step_output, "tool_input", ""))[:500],
+            )
+        else:
+            self.emit("agent_step", task=current_task_name(), final=hasattr(step_output, "output"))
+
+    def llm_call(self, model, prompt_tokens, completion_tokens, duration, cached=False, estimated=False):
+        # `estimated`: the token counts are re-tokenized, not the provider's usage
+        self.emit(
+            "llm_call",
+            task=current_task_name(),
+            model=model,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            duration=round(duration, 3),
+            cached=cached,
+            estimated=estimated,
+        )
+
+    def llm_error(self, model, error, duration):
+        self.emit(
+            "llm_error",
+            task=current_task_name(),
+            model=model,
+            error=str(error)[:500],
+            duration=round(duration, 3),
+        )
@@ -0,0 +1,223 @@
+"""Process-wide token-bucket rate limits for the LLM and the external tools.
+
+Every real LLM completion and search tool call waits for a token from its
+provider's bucket, so parallel tasks and concurrent runs share one budget
+instead of each agent pacing itself. Waiters are served by priority: calls
+made by tasks on the critical path (the sequential tasks every run waits
+on) go before the parallel research tasks, then first come, first served.
+
+MARKETCOMPARE_RATE_LIMITS sets requests per minute per provider
+("openai=60,serper=30,website=60" by default; the LLM provider is the
+model's litellm prefix, `openai` when it has none) and
+MARKETCOMPARE_RATE_LIMIT=off disables limiting. Set
+MARKETCOMPARE_RATE_LIMIT_DIR to share the buckets between processes
+through lock files; any backend with the same `take()` method (e.g. one on
+Redis) can be plugged in with `set_bucket`.
+"""
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from .cache import env_flag
+from .progress import current_task_name
+
+DEFAULT_LIMITS = {"openai": 60, "serper": 30, "website": 60}
+DEFAULT_PRIORITY_TASKS = ("init_task", "data_synthesis_task", "recommendation_task", "final_report_task")
+
+HIGH_PRIORITY = 0
+NORMAL_PRIORITY = 1
+
+_limiters = {}
+_lock = threading.Lock()
+
+
+def configured_limits():
+    """Requests per minute per provider from MARKETCOMPARE_RATE_LIMITS."""
+    limits = dict(DEFAULT_LIMITS)
+    for item in os.getenv("MARKETCOMPARE_RATE_LIMITS", "").split(","):
+        if "=" in item:
+            provider, rate = item.split("=", 1)
+            limits[provider.strip().lower()] = float(rate)
+    return limits
+
+
+def task_priority(task_name=None):
+    """HIGH_PRIORITY for critical-path tasks (MARKETCOMPARE_RATE_LIMIT_PRIORITY_TASKS), else NORMAL_PRIORITY."""
+    task_name = task_name or current_task_name()
+    configured = os.getenv("MARKETCOMPARE_RATE_LIMIT_PRIORITY_TASKS")
+    critical = [name.strip() for name in configured.split(",")] if configured else DEFAULT_PRIORITY_TASKS
+    return HIGH_PRIORITY if task_name in critical else NORMAL_PRIORITY
+
+
+class LocalBucket:
+    """In-memory token bucket: `rate_per_minute` tokens per minute, up to `burst` saved."""
+
+    def __init__(self, rate_per_minute, burst):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self):
+        """Take a token; returns 0 on success or the seconds until one is available."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+
+class FileBucket:
+    """Token bucket whose state lives in a lock-protected file shared by processes."""
+
+    def __init__(self, path, rate_per_minute, burst):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.rate = rate_per_minute / 60.0
+        self.capacity = burst
+
+    def take(self):
+        import fcntl
+
+        with open(self.path, "a+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                content = f.read()
+                state = json.loads(content) if content.strip() else {"tokens": self.capacity, "updated": time.time()}
+                now = time.time()
+                tokens = min(self.capacity, state["tokens"] + (now - state["updated"]) * self.rate)
+                wait = 0.0
+                if tokens >= 1:
+                    tokens -= 1
+                else:
+                    wait = (1 - tokens) / self.rate
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps({"tokens": tokens, "updated": now}))
+                return wait
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class RateLimiter:
+    """Priority queue of callers in front of one provider's bucket, with wait metrics."""
+
+    def __init__(self, provider, bucket):
+        self.provider = provider
+        self.bucket = bucket
+        self.acquired = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self._waiters = []
+        self._seq = itertools.count()
+        self._condition = threading.Condition()
+
+    def acquire(self, priority=None):
+        """Block until this caller may make one request; returns the seconds spent queued."""
+        priority = task_priority() if priority is None else priority
+        started = time.monotonic()
+        entry = (priority, next(self._seq))
+        with self._condition:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    timeout = None
+                    if self._waiters[0] == entry:
+                        timeout = self.bucket.take()
+                        if timeout == 0:
+                            break
+                    self._condition.wait(timeout=timeout)
+            finally:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._condition.notify_all()
+            waited = time.monotonic() - started
+            self.acquired += 1
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        return waited
+
+    def stats(self):
+        with self._condition:
+            return {
+                "acquired": self.acquired,
+                "queued": len(self._waiters),
+                "wait_seconds": round(self.wait_seconds, 3),
+                "max_wait_seconds": round(self.max_wait_seconds, 3),
+            }
+
+
+def _make_bucket(provider, rate):
+    burst = max(1, int(rate // 10))
+    shared_dir = os.getenv("MARKETCOMPARE_RATE_LIMIT_DIR")
+    if shared_dir:
+        return FileBucket(Path(shared_dir) / f"{provider}.json", rate, burst)
+    return LocalBucket(rate, burst)
+
+
+def get_limiter(provider):
+    """Return the shared limiter of `provider`, or None when it has no limit or limiting is off."""
+    if not env_flag("MARKETCOMPARE_RATE_LIMIT"):
+        return None
+    provider = provider.lower()
+    limiter = _limiters.get(provider)
+    if limiter is None:
+        rate = configured_limits().get(provider)
+        if not rate:
+            return None
+        with _lock:
+            limiter = _limiters.get(provider)
+            if limiter is None:
+                limiter = _limiters[provider] = RateLimiter(provider, _make_bucket(provider, rate))
+    return limiter
+
+
+def set_bucket(provider, bucket):
+    """Use `bucket` (anything with `take()`) for `provider`, e.g. a Redis-backed bucket."""
+    with _lock:
+        _limiters[provider.lower()] = RateLimiter(provider.lower(), bucket)
+
+
+def acquire(provider):
+    """Wait for a request slot of `provider`; no-op when it is not limited."""
+    limiter = get_limiter(provider)
+    if limiter is not None:
+        limiter.acquire()
+
+
+def llm_provider(model):
+    """'anthropic/claude-3' -> 'anthropic'; unprefixed models are OpenAI's."""
+    return model.split("/", 1)[0].lower() if model and "/" in model else "openai"
+
+
+def render_prometheus():
+    with _lock:
+        limiters = sorted(_limiters.items())
+    lines = [
+        "# HELP marketcompare_rate_limit_wait_seconds_total Time calls spent queued for a rate limit.",
+        "# TYPE marketcompare_rate_limit_wait_seconds_total counter",
+    ]
+    for provider, limiter in limiters:
+        lines.append(f'marketcompare_rate_limit_wait_seconds_total{{provider="{provider}"}} {limiter.wait_seconds:.6f}')
+    lines += [
+        "# HELP marketcompare_rate_limit_acquired_total Calls admitted by the rate limiter.",
+        "# TYPE marketcompare_rate_limit_acquired_total counter",
+    ]
+    for provider, limiter in limiters:
+        lines.append(f'marketcompare_rate_limit_acquired_total{{provider="{provider}"}} {limiter.acquired}')
+    lines += [
+        "# HELP marketcompare_rate_limit_queued Calls currently waiting for a rate limit.",
+        "# TYPE marketcompare_rate_limit_queued gauge",
+    ]
+    for provider, limiter in limiters:
+        lines.append(f'marketcompare_rate_limit_queued{{provider="{provider}"}} {limiter.stats()["queued"]}')
+    return "\n".join(lines) + "\n"
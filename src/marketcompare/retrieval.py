@@ -0,0 +1,192 @@
+import math
+import os
+import re
+from collections import Counter
+from typing import Dict, List
+
+from pydantic import BaseModel, Field
+
+from .financials import format_financial_context, parse_financial_statements
+
+# Supported values for MARKETCOMPARE_RETRIEVAL
+BM25_MODE = "bm25"
+FULL_MODE = "full"
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.*)$")
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9$%.\-]*")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or our that the this to was we were will with".split()
+)
+
+
+class Passage(BaseModel):
+    """A chunk of a company document with its source attribution."""
+    source: str = Field(..., description="Document title, e.g. 'Annual Report 2024'")
+    section: str = Field(default="", description="Heading path of the chunk inside the document")
+    text: str = Field(..., description="Passage text")
+    position: int = Field(default=0, description="Order of the chunk inside its document")
+
+    @property
+    def label(self) -> str:
+        return f"{self.source} - {self.section}" if self.section else self.source
+
+
+# Context variable -> (document keys it may draw from, retrieval query, top-k)
+TASK_RETRIEVAL = {
+    "internal_data_context": (
+        [
+            "annual_report_2024", "marketing_report_q1_2025", "operational_report_q1_2025", "sales_report_q1_2025",
+            "internal_pricing_document", "product_roadmap_h2_2025", "customer_feedback_summary_q1_2025",
+        ],
+        "company strengths weaknesses challenges competitive advantage product features capabilities "
+        "pricing plans tiers price per user discounts strategy initiatives roadmap revenue growth margin "
+        "customers churn retention satisfaction",
+        16,
+    ),
+    "market_research_context": (
+        ["annual_report_2024", "marketing_report_q1_2025"],
+        "industry market trends growth opportunities threats market share competitors regions expansion "
+        "target segments positioning",
+        8,
+    ),
+    "competitor_context": (
+        ["marketing_report_q1_2025", "internal_pricing_document", "customer_feedback_summary_q1_2025"],
+        "competitor competitors pricing price tier discount promotion features comparison customer "
+        "satisfaction churn switching reviews positioning",
+        10,
+    ),
+    "recommendation_context": (
+        ["product_roadmap_h2_2025"],
+        "investment budget roadmap priorities timeline features launch milestones risks dependencies",
+        6,
+    ),
+}
+
+
+def document_title(key: str) -> str:
+    """'customer_feedback_summary_q1_2025' -> 'Customer Feedback Summary Q1 2025'"""
+    return key.replace("_", " ").title()
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = (token.strip(".-") for token in _TOKEN.findall(text.lower()))
+    return [token for token in tokens if token and token not in _STOPWORDS]
+
+
+def chunk_document(source: str, text: str, max_chars: int = 1200) -> List[Passage]:
+    """Split a markdown-like document into passages along its headings.
+
+    Paragraphs of one section are packed together up to about `max_chars`;
+    every passage records the heading path it came from (the document's
+    top-level title is left out of the path).
+    """
+    passages: List[Passage] = []
+    headings = []  # (depth, title) of the enclosing headings
+    buffer: List[str] = []
+
+    def flush():
+        body = "\n".join(buffer).strip()
+        buffer.clear()
+        if body:
+            path = [title for depth, title in headings if depth > 1] or [title for _, title in headings]
+            passages.append(Passage(source=source, section=" > ".join(path), text=body, position=len(passages)))
+
+    for line in (text or "").splitlines():
+        match = _HEADING.match(line.strip())
+        if match:
+            flush()
+            depth = len(match.group(1))
+            headings = [(d, title) for d, title in headings if d < depth]
+            headings.append((depth, match.group(2).strip().strip("*")))
+            continue
+        size = sum(len(part) for part in buffer)
+        # Prefer to break at a blank line, but never let a passage grow unbounded
+        if (not line.strip() and size >= max_chars) or size >= max_chars * 1.5:
+            flush()
+        buffer.append(line)
+    flush()
+    return passages
+
+
+class BM25Index:
+    """Okapi BM25 ranking over a list of passages, built in memory."""
+
+    def __init__(self, passages: List[Passage], k1: float = 1.5, b: float = 0.75):
+        self.passages = passages
+        self.k1 = k1
+        self.b = b
+        self._terms = [Counter(tokenize(f"{p.section}\n{p.text}")) for p in passages]
+        self._lengths = [sum(terms.values()) for terms in self._terms]
+        self._avg_length = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0.0
+        document_frequency = Counter(term for terms in self._terms for term in terms)
+        total = len(passages)
+        self._idf = {
+            term: math.log(1 + (total - freq + 0.5) / (freq + 0.5))
+            for term, freq in document_frequency.items()
+        }
+
+    def scores(self, query: str) -> List[float]:
+        query_terms = tokenize(query)
+        scores = []
+        for terms, length in zip(self._terms, self._lengths):
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * length / self._avg_length) if self._avg_length else self.k1
+            for term in query_terms:
+                freq = terms.get(term)
+                if freq:
+                    score += self._idf[term] * freq * (self.k1 + 1) / (freq + norm)
+            scores.append(score)
+        return scores
+
+    def top_k(self, query: str, k: int) -> List[Passage]:
+        """Best `k` passages, guaranteeing each source's best passage a slot."""
+        ranked = sorted(zip(self.scores(query), range(len(self.passages))), reverse=True)
+        chosen, seen_sources = [], set()
+        for score, index in ranked:
+            source = self.passages[index].source
+            if source not in seen_sources:
+                seen_sources.add(source)
+                chosen.append(index)
+        for score, index in ranked:
+            if len(chosen) >= max(k, len(seen_sources)):
+                break
+            if index not in chosen and score > 0:
+                chosen.append(index)
+        return [self.passages[index] for index in chosen]
+
+
+def format_passages(passages: List[Passage]) -> str:
+    """Render passages grouped by source in document order, each with its label."""
+    ordered = sorted(passages, key=lambda p: (p.source, p.position))
+    return "\n\n".join(f"[{p.label}]\n{p.text}" for p in ordered)
+
+
+def get_retrieval_mode() -> str:
+    mode = os.getenv("MARKETCOMPARE_RETRIEVAL", BM25_MODE).strip().lower()
+    if mode not in (BM25_MODE, FULL_MODE):
+        raise ValueError(f"Unknown MARKETCOMPARE_RETRIEVAL '{mode}', expected '{BM25_MODE}' or '{FULL_MODE}'")
+    return mode
+
+
+def build_task_contexts(documents: Dict[str, str], mode: str = None) -> Dict[str, str]:
+    """Build the per-task context inputs referenced in tasks.yaml.
+
+    `documents` maps input keys (e.g. 'annual_report_2024') to their text. In
+    'bm25' mode each task receives the top-k passages for its query
+    (MARKETCOMPARE_RETRIEVAL_TOP_K overrides k for every task); in 'full'
+    mode it receives its documents verbatim, as before. The financial
+    statements are not retrieved at all: they are parsed into exact figures
+    and passed as `financial_figures` in both modes.
+    """
+    mode = mode or get_retrieval_mode()
+    top_k_override = os.getenv("MARKETCOMPARE_RETRIEVAL_TOP_K")
+    contexts = {"financial_figures": format_financial_context(parse_financial_statements(documents))}
+    for variable, (keys, query, top_k) in TASK_RETRIEVAL.items():
+        available = [key for key in keys if documents.get(key)]
+        if mode == FULL_MODE:
+            contexts[variable] = "\n\n".join(f"[{document_title(key)}]\n{documents[key]}" for key in available)
+            continue
+        passages = [p for key in available for p in chunk_document(document_title(key), documents[key])]
+        index = BM25Index(passages)
+        contexts[variable] = format_passages(index.top_k(query, int(top_k_override or top_k)))
+    return contexts
@@ -0,0 +1,242 @@
+import hashlib
+import io
+import json
+import re
+from typing import Optional
+
+from fastapi import APIRouter, Header
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+
+from .artifacts import CHUNK_SIZE, get_artifact_store
+
+from .jobs import FAILED, SUCCEEDED, JobQueueFull, get_job_manager
+from .mongo import get_database
+from .ratelimit import render_prometheus as render_rate_limits
+from .spans import registry
+from .tool_cache import get_tool_cache
+
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+_ENTITY_TAG = re.compile(r'(?:W/)?"([^"]*)"')
+
+# Endpoints shared by api/index.py and marketcompare.api
+router = APIRouter()
+
+
+@router.post("/jobs", status_code=202)
+def create_job():
+    """Queue a market comparison run and return its job id immediately."""
+    try:
+        job = get_job_manager().submit()
+    except JobQueueFull as e:
+        return JSONResponse(content={"error": str(e)}, status_code=429)
+    return job.to_dict()
+
+
+@router.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return JSONResponse(content={"error": f"Unknown job '{job_id}'"}, status_code=404)
+    return job.to_dict()
+
+
+@router.get("/jobs/{job_id}/result")
+def get_job_result(job_id: str):
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return JSONResponse(content={"error": f"Unknown job '{job_id}'"}, status_code=404)
+    if job.status == FAILED:
+        return JSONResponse(content={"error": job.error}, status_code=500)
+    if job.status != SUCCEEDED:
+        return JSONResponse(content={"error": f"Job is {job.status}", "status": job.status}, status_code=409)
+    return JSONResponse(content=job.result)
+
+
+@router.get("/jobs/{job_id}/metrics")
+def get_job_metrics(job_id: str):
+    """Per-task tokens, cost, LLM/tool calls, retries and timing; live while the job runs."""
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return JSONResponse(content={"error": f"Unknown job '{job_id}'"}, status_code=404)
+    return {"job_id": job.id, "status": job.status, **job.metrics.summary()}
+
+
+@router.get("/reports/{report_id}/metrics")
+def get_report_metrics(report_id: str):
+    """Run metrics stored with a report in Market_LLM_Output."""
+    from bson import ObjectId
+    from bson.errors import InvalidId
+
+    try:
+        object_id = ObjectId(report_id)
+    except InvalidId:
+        return JSONResponse(content={"error": f"Invalid report id '{report_id}'"}, status_code=400)
+    doc = get_database()["Market_LLM_Output"].find_one({"_id": object_id}, {"run_metrics": 1})
+    if doc is None:
+        return JSONResponse(content={"error": f"Unknown report '{report_id}'"}, status_code=404)
+    if not doc.get("run_metrics"):
+        return JSONResponse(content={"error": "Report has no run metrics"}, status_code=404)
+    return doc["run_metrics"]
+
+
+def _parse_range(header, size):
+    """(start, end) inclusive for a single `bytes=` range; None serves the whole file.
+
+    Raises ValueError when the range cannot be satisfied. Multi-range and
+    malformed headers are ignored, as RFC 9110 allows.
+    """
+    match = _RANGE.match(header.strip()) if header else None
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError("empty suffix range")
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError("range not satisfiable")
+    return start, end
+
+
+def _etag_matches(if_none_match, etag):
+    """RFC 9110 If-None-Match: `*` or any listed entity-tag, compared weakly (W/ ignored)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/").strip('"')
+    return opaque in _ENTITY_TAG.findall(if_none_match)
+
+
+def _if_range_matches(if_range, etag):
+    """RFC 9110 If-Range: the Range applies only if the validator is still current.
+
+    Entity-tags are compared strongly; a date never matches because the
+    response carries no Last-Modified, so the full file is served instead.
+    """
+    return not if_range or if_range.strip() == etag
+
+
+def _iter_range(source, start, length):
+    """Read `length` bytes from `start` one chunk at a time, then close the source."""
+    try:
+        source.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = source.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        source.close()
+
+
+@router.get("/reports/{report_id}/pdf")
+def download_report_pdf(
+    report_id: str,
+    range_header: Optional[str] = Header(default=None, alias="Range"),
+    if_none_match: Optional[str] = Header(default=None),
+    if_range: Optional[str] = Header(default=None),
+):
+    """Stream the newest PDF of a report from GridFS, with Range and ETag support.
+
+    The artifact is read chunk by chunk, so memory per download stays
+    constant whatever the size of the report.
+    """
+    db = get_database()
+    doc = db["Market_Report"].find_one({"report_id": report_id}, sort=[("created_at", -1)])
+    if doc is None:
+        return JSONResponse(content={"error": f"No PDF for report '{report_id}'"}, status_code=404)
+
+    if doc.get("pdf_id") is not None:
+        source = get_artifact_store(db).open(doc["pdf_id"])
+        # GridFS files written without metadata fall back to their (immutable) file id
+        size = source.length
+        sha256 = doc.get("pdf_sha256") or (source.metadata or {}).get("sha256") or str(source._id)
+    else:
+        # Reports stored before GridFS keep the PDF inline
+        data = doc.get("pdf") or b""
+        source = io.BytesIO(data)
+        size, sha256 = len(data), hashlib.sha256(data).hexdigest()
+
+    etag = f'"{sha256}"'
+    headers = {"Accept-Ranges": "bytes", "ETag": etag,
+               "Content-Disposition": f'inline; filename="{doc.get("filename") or "report.pdf"}"'}
+    if _etag_matches(if_none_match, etag):
+        source.close()
+        return Response(status_code=304, headers=headers)
+
+    if not _if_range_matches(if_range, etag):
+        # The client's partial copy is stale: send the whole current file
+        range_header = None
+    try:
+        byte_range = _parse_range(range_header, size)
+    except ValueError:
+        source.close()
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+    status_code = 200
+    start, end = 0, size - 1
+    if byte_range is not None:
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        _iter_range(source, start, end - start + 1),
+        status_code=status_code,
+        media_type="application/pdf",
+        headers=headers,
+    )
+
+
+@router.post("/jobs/{job_id}/cancel")
+def cancel_job(job_id: str):
+    """Request cancellation; the run stops at its next task, LLM call or agent step."""
+    job = get_job_manager().cancel(job_id)
+    if job is None:
+        return JSONResponse(content={"error": f"Unknown job '{job_id}'"}, status_code=404)
+    return job.to_dict()
+
+
+@router.get("/jobs/{job_id}/events")
+def stream_job_events(job_id: str, last_event_id: Optional[str] = Header(default=None)):
+    """Stream the job's progress events as server-sent events.
+
+    Each event carries its sequence number as the SSE id, so a reconnecting
+    client sending Last-Event-ID resumes where it left off.
+    """
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return JSONResponse(content={"error": f"Unknown job '{job_id}'"}, status_code=404)
+    after = int(last_event_id) if last_event_id and last_event_id.isdigit() else 0
+
+    def event_stream():
+        for event in job.progress.iter_events(after=after):
+            if event is None:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"id: {event['seq']}\nevent: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Stage timings, rate limiter queueing and search cache counters in the Prometheus text format."""
+    body = registry.render_prometheus() + render_rate_limits()
+    tool_cache = get_tool_cache()
+    if tool_cache is not None:
+        body += tool_cache.render_prometheus()
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
@@ -0,0 +1,68 @@
+from typing import Dict, List
+import os
+
+from crewai import Task
+
+
+# Supported values for MARKETCOMPARE_EXECUTION_MODE
+HIERARCHICAL_MODE = "hierarchical"
+DAG_MODE = "dag"
+
+
+def get_execution_mode() -> str:
+    """Return the configured crew execution mode ('hierarchical' or 'dag')."""
+    mode = os.getenv("MARKETCOMPARE_EXECUTION_MODE", HIERARCHICAL_MODE).strip().lower()
+    if mode not in (HIERARCHICAL_MODE, DAG_MODE):
+        raise ValueError(
+            f"Unknown MARKETCOMPARE_EXECUTION_MODE '{mode}', expected '{HIERARCHICAL_MODE}' or '{DAG_MODE}'"
+        )
+    return mode
+
+
+def plan_task_levels(tasks: List[Task]) -> List[List[Task]]:
+    """Group tasks into dependency levels using their `context` lists.
+
+    Every task in a level only depends on tasks from earlier levels, so the
+    tasks of one level can run concurrently. Tasks keep their declaration
+    order inside a level.
+    """
+    positions = {id(task): index for index, task in enumerate(tasks)}
+    levels: Dict[int, int] = {}
+
+    def level_of(task: Task, visiting: tuple = ()) -> int:
+        key = id(task)
+        if key in levels:
+            return levels[key]
+        if key in visiting:
+            raise ValueError(f"Task '{task.name}' has a circular context dependency")
+        deps = [dep for dep in (task.context if isinstance(task.context, list) else []) if id(dep) in positions]
+        level = 1 + max((level_of(dep, visiting + (key,)) for dep in deps), default=-1)
+        levels[key] = level
+        return level
+
+    grouped: Dict[int, List[Task]] = {}
+    for task in tasks:
+        grouped.setdefault(level_of(task), []).append(task)
+    return [grouped[level] for level in sorted(grouped)]
+
+
+def apply_dag_schedule(tasks: List[Task]) -> List[Task]:
+    """Order tasks by dependency level and mark independent ones as async.
+
+    crewAI runs consecutive `async_execution` tasks in parallel threads and
+    joins them at the next synchronous task, so fanning out a level only
+    requires marking its tasks async. A task stays synchronous when it is
+    alone in its level or when one of its dependencies is async, which makes
+    it the join point for the preceding fan-out.
+    """
+    ordered: List[Task] = []
+    for level in plan_task_levels(tasks):
+        for task in level:
+            deps = task.context if isinstance(task.context, list) else []
+            task.async_execution = len(level) > 1 and not any(dep.async_execution for dep in deps)
+            ordered.append(task)
+
+    # crewAI only allows a single trailing async task
+    if len(ordered) > 1 and ordered[-1].async_execution and ordered[-2].async_execution:
+        ordered[-1].async_execution = False
+    return ordered
@@ -0,0 +1,190 @@
+import contextvars
+import functools
+import json
+import logging
+import sys
+import threading
+import time
+from bisect import bisect_left
+
+from .cache import env_flag
+
+# Upper bounds (seconds) of the Prometheus histogram buckets
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+logger = logging.getLogger("marketcompare.spans")
+if not logger.handlers:
+    _handler = logging.StreamHandler(sys.stderr)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+_current = contextvars.ContextVar("marketcompare_span", default=None)
+_enabled = None
+
+
+def spans_enabled():
+    """Whether spans are recorded (MARKETCOMPARE_SPANS=on; off by default)."""
+    global _enabled
+    if _enabled is None:
+        _enabled = env_flag("MARKETCOMPARE_SPANS", default=False)
+    return _enabled
+
+
+def set_spans_enabled(enabled):
+    global _enabled
+    _enabled = enabled
+
+
+class _Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+
+class SpanRegistry:
+    """Aggregated span durations, rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, seconds):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = _Histogram()
+            histogram.counts[bisect_left(BUCKETS, seconds)] += 1
+            histogram.count += 1
+            histogram.sum += seconds
+
+    def render_prometheus(self):
+        lines = [
+            "# HELP marketcompare_span_duration_seconds Duration of pipeline stages.",
+            "# TYPE marketcompare_span_duration_seconds histogram",
+        ]
+        with self._lock:
+            for name in sorted(self._histograms):
+                histogram = self._histograms[name]
+                cumulative = 0
+                for bound, count in zip(BUCKETS, histogram.counts):
+                    cumulative += count
+                    lines.append(f'marketcompare_span_duration_seconds_bucket{{span="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'marketcompare_span_duration_seconds_bucket{{span="{name}",le="+Inf"}} {histogram.count}')
+                lines.append(f'marketcompare_span_duration_seconds_sum{{span="{name}"}} {histogram.sum:.6f}')
+                lines.append(f'marketcompare_span_duration_seconds_count{{span="{name}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        """{span name: (count, total seconds)} of everything observed so far."""
+        with self._lock:
+            return {name: (h.count, h.sum) for name, h in self._histograms.items()}
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+
+registry = SpanRegistry()
+
+
+class Span:
+    """A timed stage; nested spans started while it is open become its children.
+
+    Use `span(name)` as a context manager, or `start_span(name)` and `end()`
+    around code that is awkward to indent. When a top-level span ends, its
+    whole tree is logged as one JSON line.
+    """
+
+    def __init__(self, name, attributes):
+        self.name = name
+        self.attributes = attributes
+        self.children = []
+        self.error = None
+        self.duration = None
+        self._parent = _current.get()
+        if self._parent is not None:
+            self._parent.children.append(self)
+        self._token = _current.set(self)
+        self._started = time.perf_counter()
+        self._start_time = time.time()
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def end(self, error=None):
+        if self.duration is not None:
+            return
+        self.duration = time.perf_counter() - self._started
+        self.error = error
+        try:
+            _current.reset(self._token)
+        except ValueError:
+            # Ended from another context; just drop back to the parent
+            _current.set(self._parent)
+        registry.observe(self.name, self.duration)
+        if self._parent is None:
+            logger.info(json.dumps({"span": self.to_dict()}, default=str))
+
+    def to_dict(self):
+        data = {
+            "name": self.name,
+            "start": round(self._start_time, 6),
+            "duration_ms": round((self.duration or 0.0) * 1000, 3),
+        }
+        if self.attributes:
+            data["attributes"] = self.attributes
+        if self.error:
+            data["error"] = self.error
+        if self.children:
+            data["children"] = [child.to_dict() for child in self.children]
+        return data
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end(error=f"{exc_type.__name__}: {exc}" if exc_type else None)
+        return False
+
+
+class _NoopSpan:
+    """Returned while spans are disabled: every operation does nothing."""
+
+    def set(self, **attributes):
+        pass
+
+    def end(self, error=None):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+def start_span(name, **attributes):
+    if not spans_enabled():
+        return _NOOP
+    return Span(name, attributes)
+
+
+# Same object; reads better as `with span("run.crew"):`
+span = start_span
+
+
+def traced(name):
+    """Decorator timing every call of the function as a span."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with start_span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,162 @@
+import datetime
+import json
+import os
+import threading
+import time
+from typing import Any, Optional
+
+from crewai import Task
+from crewai.tasks.task_output import TaskOutput
+from pydantic import Field
+
+from .cache import DiskCache, cache_dir, env_flag, make_key
+from .cassette import get_cassette
+
+DEFAULT_TTL_HOURS = 168
+
+_task_cache = None
+_task_cache_lock = threading.Lock()
+
+
+def get_task_cache():
+    """Return the shared task output store, or None when it is bypassed.
+
+    Set MARKETCOMPARE_TASK_CACHE=off to recompute every task and
+    MARKETCOMPARE_TASK_CACHE_MAX_MB to bound its size on disk.
+    """
+    global _task_cache
+    if not env_flag("MARKETCOMPARE_TASK_CACHE"):
+        return None
+    if _task_cache is None:
+        with _task_cache_lock:
+            if _task_cache is None:
+                max_mb = int(os.getenv("MARKETCOMPARE_TASK_CACHE_MAX_MB", "128"))
+                _task_cache = DiskCache(cache_dir() / "task_outputs.sqlite3", max_bytes=max_mb * 1024 * 1024)
+    return _task_cache
+
+
+class CachedTask(Task):
+    """Task that reuses its stored output when its inputs have not changed.
+
+    The fingerprint covers the interpolated description (and therefore every
+    document placed in it), the expected output, the output schema, the
+    executing agent and its model, and the upstream context. A changed
+    document therefore invalidates the tasks that read it and, through their
+    new outputs, every task downstream of them; all other tasks are reused.
+
+    Stored outputs expire after `ttl_seconds()`, so tasks that research the
+    web do not serve old market data indefinitely.
+    """
+
+    # RunProgress notified when the task starts (set by the crew)
+    progress: Optional[Any] = Field(default=None, exclude=True)
+    # Hours a stored output stays valid; None uses MARKETCOMPARE_TASK_CACHE_TTL_HOURS
+    cache_ttl_hours: Optional[float] = Field(default=None, exclude=True)
+
+    def ttl_seconds(self):
+        """Age after which the stored output is recomputed.
+
+        MARKETCOMPARE_TASK_CACHE_TTL_HOURS_<TASK_NAME> (e.g.
+        ..._MARKET_RESEARCH_TASK) overrides the task's `cache_ttl_hours`,
+        which overrides MARKETCOMPARE_TASK_CACHE_TTL_HOURS (default 168).
+        """
+        hours = os.getenv(f"MARKETCOMPARE_TASK_CACHE_TTL_HOURS_{(self.name or '').upper()}")
+        if hours is None and self.cache_ttl_hours is not None:
+            hours = self.cache_ttl_hours
+        if hours is None:
+            hours = os.getenv("MARKETCOMPARE_TASK_CACHE_TTL_HOURS", str(DEFAULT_TTL_HOURS))
+        return float(hours) * 3600
+
+    def use_task_cache(self):
+        """Whether this task reads and writes the task cache (subclasses with their own store opt out)."""
+        return True
+
+    def cache_key(self, agent, context):
+        llm = getattr(agent, "llm", None)
+        return make_key(
+            self.name,
+            self.description,
+            self.expected_output,
+            self.output_pydantic.model_json_schema() if self.output_pydantic else None,
+            getattr(agent, "role", None),
+            getattr(llm, "model", None),
+            getattr(llm, "temperature", None),
+            context or "",
+        )
+
+    def _execute_core(self, agent, context, tools):
+        agent = agent or self.agent
+        if self.progress is not None:
+            self.progress.task_started(self.name, getattr(agent, "role", None))
+
+        # Recording or replaying a cassette needs every task to really execute
+        cassette = get_cassette()
+        if cassette is not None:
+            cassette.start_task()
+            return super()._execute_core(agent, context, tools)
+
+        cache = get_task_cache() if self.use_task_cache() else None
+        if cache is None:
+            return super()._execute_core(agent, context, tools)
+
+        key = self.cache_key(agent, context)
+        stored = cache.get(key)
+        if stored is not None:
+            output = self._restore_output(stored, agent, max_age=self.ttl_seconds())
+            if output is not None:
+                print(f"♻️ Inputs of {self.name} unchanged, reusing stored output")
+                return output
+            cache.delete(key)
+
+        output = super()._execute_core(agent, context, tools)
+        cache.set(key, self._serialize_output(output))
+        return output
+
+    def _serialize_output(self, output):
+        return json.dumps({
+            "stored_at": time.time(),
+            "raw": output.raw,
+            "pydantic": output.pydantic.model_dump() if output.pydantic else None,
+            "json_dict": output.json_dict,
+        }).encode("utf-8")
+
+    def _restore_output(self, stored, agent, max_age=None):
+        """Rebuild a TaskOutput from the store; None if it is older than `max_age` seconds or no longer validates."""
+        try:
+            payload = json.loads(stored)
+            if max_age is not None and time.time() - payload.get("stored_at", 0) > max_age:
+                print(f"⌛ Stored output of {self.name} expired, recomputing")
+                return None
+            pydantic_output = None
+            if self.output_pydantic and payload.get("pydantic") is not None:
+                pydantic_output = self.output_pydantic.model_validate(payload["pydantic"])
+            elif self.output_pydantic:
+                return None
+        except Exception as e:
+            print(f"⚠️ Discarding stored output for {self.name}: {e}")
+            return None
+
+        self.agent = agent
+        self.start_time = datetime.datetime.now()
+        output = TaskOutput(
+            name=self.name,
+            description=self.description,
+            expected_output=self.expected_output,
+            raw=payload["raw"],
+            pydantic=pydantic_output,
+            json_dict=payload.get("json_dict"),
+            agent=agent.role if agent else "",
+            output_format=self._get_output_format(),
+        )
+        self.output = output
+        self.end_time = datetime.datetime.now()
+
+        # Same post-processing crewAI performs for an executed task
+        if self.callback:
+            self.callback(output)
+        crew = getattr(agent, "crew", None)
+        if crew and crew.task_callback and crew.task_callback != self.callback:
+            crew.task_callback(output)
+        if self.output_file:
+            self._save_file(output.json_dict or (pydantic_output.model_dump_json() if pydantic_output else output.raw))
+        return output
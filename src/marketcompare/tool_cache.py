@@ -0,0 +1,173 @@
+"""Persistent, deduplicating cache for the web search tools.
+
+SerperDevTool and WebsiteSearchTool results are stored on disk under a key
+built from the tool name and its normalised arguments (query case and
+whitespace do not matter; URLs are normalised like the page index does,
+so only their scheme and host are case-insensitive), and served until they are
+older than the TTL. Concurrent identical calls are single-flighted: one
+thread calls the tool and the others wait for its result. Failed calls are
+never cached.
+
+MARKETCOMPARE_TOOL_CACHE=off bypasses the cache,
+MARKETCOMPARE_TOOL_CACHE_TTL_HOURS (default 24) sets the TTL and
+MARKETCOMPARE_TOOL_CACHE_MAX_MB bounds its size on disk.
+"""
+import json
+import os
+import threading
+import time
+from typing import Type
+
+from pydantic import BaseModel
+
+from .cache import DiskCache, cache_dir, env_flag, make_key
+from .page_index import normalize_url
+from .ratelimit import acquire
+
+_tool_cache = None
+_tool_cache_lock = threading.Lock()
+
+def normalize_args(kwargs):
+    """Canonical form of tool arguments used in the cache key."""
+    normalized = {}
+    for name, value in kwargs.items():
+        if isinstance(value, str):
+            # URL paths are case-sensitive; only the scheme and host are folded
+            value = normalize_url(value) if name in ("website", "url") else " ".join(value.split()).casefold()
+        normalized[name] = value
+    return normalized
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class ToolCache:
+    """TTL cache in front of tool calls with single-flight deduplication."""
+
+    def __init__(self, store, ttl_seconds):
+        self.store = store
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def _lookup(self, key):
+        stored = self.store.get(key)
+        if stored is None:
+            return None
+        entry = json.loads(stored)
+        if time.time() - entry["at"] > self.ttl_seconds:
+            self.store.delete(key)
+            return None
+        return entry
+
+    def call(self, tool_name, kwargs, compute):
+        """Return the cached result for the call, or `compute()` it once for every waiting caller."""
+        key = make_key("tool", tool_name, normalize_args(kwargs))
+        entry = self._lookup(key)
+        if entry is not None:
+            with self._lock:
+                self.hits += 1
+            return entry["result"]
+
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+            else:
+                self.coalesced += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            # A previous leader may have stored the result since our lookup
+            entry = self._lookup(key)
+            if entry is not None:
+                with self._lock:
+                    self.hits += 1
+                flight.result = entry["result"]
+                return flight.result
+            flight.result = compute()
+            self.store.set(key, json.dumps({"at": time.time(), "result": flight.result}, default=str).encode("utf-8"))
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                if entry is None:
+                    self.misses += 1
+                del self._inflight[key]
+            flight.done.set()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            }
+
+    def render_prometheus(self):
+        stats = self.stats()
+        lines = [
+            "# HELP marketcompare_tool_cache_requests_total Search tool calls by cache outcome.",
+            "# TYPE marketcompare_tool_cache_requests_total counter",
+        ]
+        for outcome in ("hits", "misses", "coalesced"):
+            lines.append(f'marketcompare_tool_cache_requests_total{{outcome="{outcome}"}} {stats[outcome]}')
+        return "\n".join(lines) + "\n"
+
+
+def get_tool_cache():
+    """Return the shared tool result cache, or None when it is bypassed."""
+    global _tool_cache
+    if not env_flag("MARKETCOMPARE_TOOL_CACHE"):
+        return None
+    if _tool_cache is None:
+        with _tool_cache_lock:
+            if _tool_cache is None:
+                max_mb = int(os.getenv("MARKETCOMPARE_TOOL_CACHE_MAX_MB", "128"))
+                ttl_hours = float(os.getenv("MARKETCOMPARE_TOOL_CACHE_TTL_HOURS", "24"))
+                store = DiskCache(cache_dir() / "tool_results.sqlite3", max_bytes=max_mb * 1024 * 1024)
+                _tool_cache = ToolCache(store, ttl_hours * 3600)
+    return _tool_cache
+
+
+def cached_tool(tool, cache, rate_limit=None):
+    """Wrap the crewAI tool instance `tool` so its calls go through `cache` (may be None).
+
+    Calls that reach the real tool first wait for the `rate_limit` provider's
+    rate limiter (see ratelimit.py).
+    """
+    from crewai.tools import BaseTool
+
+    def call_tool(kwargs):
+        if rate_limit:
+            acquire(rate_limit)
+        return tool.run(**kwargs)
+
+    class CachedTool(BaseTool):
+        name: str = tool.name
+        # The class default: crewAI rewrites an instance's description on init
+        description: str = type(tool).model_fields["description"].default
+        args_schema: Type[BaseModel] = tool.args_schema
+
+        def _run(self, **kwargs):
+            if cache is None:
+                return call_tool(kwargs)
+            return cache.call(self.name, kwargs, lambda: call_tool(kwargs))
+
+    return CachedTool()
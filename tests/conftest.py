@@ -0,0 +1,46 @@
+import os
+
+import pytest
+
+# Tests run offline: keep crewAI from exporting telemetry when it is imported
+os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """Keep every on-disk cache of a test in its own directory."""
+    path = tmp_path / "cache"
+    monkeypatch.setenv("MARKETCOMPARE_CACHE_DIR", str(path))
+    return path
+
+
+@pytest.fixture
+def mongo_db():
+    """A fresh mongomock database whose GridFS buckets work."""
+    pytest.importorskip("mongomock")
+    from marketcompare.benchmark import mongomock_client
+
+    return mongomock_client()["marketcompare_test"]
+
+
+@pytest.fixture
+def offline_pipeline(tmp_path, monkeypatch):
+    """run() wired to the offline benchmark fakes in an empty working directory; yields the mock database."""
+    pytest.importorskip("mongomock")
+    from marketcompare import benchmark
+    from marketcompare.crew import override_tool
+    from marketcompare.llm import CachedLLM, set_llm_class
+    from marketcompare.mongo import get_database
+    from marketcompare.spans import set_spans_enabled
+
+    saved_env = dict(os.environ)
+    monkeypatch.chdir(tmp_path)
+    uri = benchmark.setup()
+    yield get_database(uri=uri)
+    override_tool("search", None)
+    override_tool("web_rag", None)
+    set_llm_class(CachedLLM)
+    set_spans_enabled(None)
+    os.environ.clear()
+    os.environ.update(saved_env)
@@ -0,0 +1,44 @@
+import hashlib
+
+from marketcompare.artifacts import ArtifactStore
+
+
+def test_put_stores_once_per_content(mongo_db):
+    store = ArtifactStore(mongo_db)
+    first_id, sha256, reused = store.put(b"%PDF-1.4 report", "a.pdf", "application/pdf")
+    assert (sha256, reused) == (hashlib.sha256(b"%PDF-1.4 report").hexdigest(), False)
+
+    second_id, _, reused = store.put(b"%PDF-1.4 report", "b.pdf", "application/pdf")
+    assert (second_id, reused) == (first_id, True)
+    assert store.files.count_documents({}) == 1
+
+    other_id, _, reused = store.put(b"other", "c.pdf")
+    assert other_id != first_id and not reused
+
+
+def test_open_reads_the_stored_bytes_in_chunks(mongo_db):
+    store = ArtifactStore(mongo_db)
+    data = bytes(range(256)) * 3000  # several GridFS chunks
+    file_id, _, _ = store.put(data, "big.bin")
+    stream = store.open(file_id)
+    assert stream.metadata["content_type"] == "application/octet-stream"
+    stream.seek(1000)
+    assert stream.read(10) == data[1000:1010]
+    stream.seek(0)
+    assert stream.read() == data
+
+
+def test_losing_a_concurrent_put_keeps_one_copy_and_drops_its_chunks(mongo_db, monkeypatch):
+    store = ArtifactStore(mongo_db)
+    winner_id, _, _ = store.put(b"same bytes", "winner.pdf")
+    chunks = store.chunks.count_documents({})
+
+    # The second writer checked before the first one finished
+    stale_lookups = [None]
+    find = store.find
+    monkeypatch.setattr(store, "find", lambda sha256: stale_lookups.pop() if stale_lookups else find(sha256))
+    file_id, _, reused = store.put(b"same bytes", "loser.pdf")
+
+    assert (file_id, reused) == (winner_id, True)
+    assert store.files.count_documents({}) == 1
+    assert store.chunks.count_documents({}) == chunks
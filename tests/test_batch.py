@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+from marketcompare.batch import ManifestError, load_manifest, run_batch, target_documents
+from marketcompare.main import DEFAULT_FILE_NAMES
+
+
+def write_manifest(tmp_path, data):
+    path = tmp_path / "manifest.json"
+    path.write_text(json.dumps(data))
+    return path
+
+
+def test_load_manifest(tmp_path):
+    targets = [{"company_name": "Acme"}, {"company_name": "Globex", "documents": {"annual_report_2024": "g.txt"}}]
+    assert load_manifest(write_manifest(tmp_path, {"targets": targets})) == targets
+    # A bare list is accepted too
+    assert load_manifest(write_manifest(tmp_path, targets)) == targets
+
+
+@pytest.mark.parametrize("data", [
+    {"targets": []},
+    {"targets": [{"documents": {}}]},
+    {"targets": [{"company_name": "Acme", "documents": ["a.txt"]}]},
+    {"other": 1},
+])
+def test_load_manifest_rejects_malformed(tmp_path, data):
+    with pytest.raises(ManifestError):
+        load_manifest(write_manifest(tmp_path, data))
+
+
+def test_load_manifest_rejects_unreadable(tmp_path):
+    with pytest.raises(ManifestError):
+        load_manifest(tmp_path / "missing.json")
+    path = tmp_path / "broken.json"
+    path.write_text("{not json")
+    with pytest.raises(ManifestError):
+        load_manifest(path)
+
+
+def test_target_documents():
+    assert target_documents({"company_name": "Acme"}) is None
+    documents = target_documents({"company_name": "Acme", "user_preference": "acme_prefs.txt"})
+    assert documents == {**DEFAULT_FILE_NAMES, "user_preference": "acme_prefs.txt"}
+    assert target_documents({"company_name": "Acme", "documents": {"annual_report_2024": "a.txt"}}) == {
+        "annual_report_2024": "a.txt",
+    }
+
+
+def test_run_batch_keeps_order_and_reports_failures(monkeypatch):
+    import marketcompare.main
+
+    calls = []
+
+    def fake_run(progress, company_name, documents, save_files):
+        calls.append((company_name, save_files))
+        if company_name == "Broken":
+            raise RuntimeError("no documents")
+        return {"_id": f"id-{company_name}"}
+
+    monkeypatch.setattr(marketcompare.main, "run", fake_run)
+    results = run_batch([{"company_name": "Acme"}, {"company_name": "Broken"}], max_concurrency=2)
+    assert [result["status"] for result in results] == ["succeeded", "failed"]
+    assert results[0]["report_id"] == "id-Acme"
+    assert "no documents" in results[1]["error"]
+    assert all(save_files is False for _, save_files in calls)
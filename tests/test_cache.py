@@ -0,0 +1,45 @@
+from marketcompare.cache import DiskCache, env_flag, make_key
+
+
+def test_make_key_is_stable_and_order_independent():
+    assert make_key("a", {"x": 1, "y": 2}) == make_key("a", {"y": 2, "x": 1})
+    assert make_key("a", 1) != make_key("a", 2)
+
+
+def test_env_flag(monkeypatch):
+    monkeypatch.delenv("MARKETCOMPARE_TEST_FLAG", raising=False)
+    assert env_flag("MARKETCOMPARE_TEST_FLAG") is True
+    assert env_flag("MARKETCOMPARE_TEST_FLAG", default=False) is False
+    for value in ("off", "0", "False", "no", "bypass"):
+        monkeypatch.setenv("MARKETCOMPARE_TEST_FLAG", value)
+        assert env_flag("MARKETCOMPARE_TEST_FLAG") is False
+    monkeypatch.setenv("MARKETCOMPARE_TEST_FLAG", "on")
+    assert env_flag("MARKETCOMPARE_TEST_FLAG", default=False) is True
+
+
+def test_disk_cache_round_trip(tmp_path):
+    cache = DiskCache(tmp_path / "c.sqlite3")
+    assert cache.get("k") is None
+    cache.set("k", b"value")
+    assert cache.get("k") == b"value"
+    cache.delete("k")
+    assert cache.get("k") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    cache = DiskCache(tmp_path / "c.sqlite3", max_bytes=10)
+    cache.set("a", b"aaaa")
+    cache.set("b", b"bbbb")
+    cache.get("a")  # "b" is now the least recently used
+    cache.set("c", b"cccc")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"aaaa"
+    assert cache.get("c") == b"cccc"
+    assert cache.stats()["bytes"] <= 10
+
+
+def test_disk_cache_persists(tmp_path):
+    DiskCache(tmp_path / "c.sqlite3").set("k", b"v")
+    assert DiskCache(tmp_path / "c.sqlite3").get("k") == b"v"
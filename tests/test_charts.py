@@ -0,0 +1,60 @@
+import pytest
+
+from marketcompare import charts
+from marketcompare.charts import render_charts, report_chart_specs
+
+REPORT = {
+    "swot_analysis": {"strengths": ["a", "b"], "weaknesses": ["c"], "opportunities": [], "threats": ["d"]},
+    "pricing_comparison": {
+        "our_pricing": [{"product_line": "ProjectFlow", "price_range": 24}],
+        "competitor_pricing": [{"competitor": "A", "price_range": 25}],
+    },
+    "recommendations": {"immediate_actions": ["x"], "long_term_initiatives": ["y", "z"]},
+}
+PNG = b"\x89PNG\r\n\x1a\n"
+
+
+@pytest.fixture(autouse=True)
+def no_shared_state(monkeypatch):
+    monkeypatch.delenv("MARKETCOMPARE_CHART_WORKERS", raising=False)
+    monkeypatch.setattr(charts, "_chart_cache", None)
+    monkeypatch.setattr(charts, "_default_workers", 0)
+    yield
+    charts.shutdown_pool()
+
+
+def test_library_callers_render_in_process(monkeypatch):
+    monkeypatch.setenv("MARKETCOMPARE_CHART_CACHE", "off")
+    images = render_charts(report_chart_specs(REPORT))
+    assert len(images) == 3 and all(image.startswith(PNG) for image in images)
+    assert charts._pool is None
+
+
+def test_enable_render_pool_sets_the_default(monkeypatch):
+    assert charts.chart_workers() == 0
+    charts.enable_render_pool()
+    assert charts.chart_workers() >= 1
+    monkeypatch.setenv("MARKETCOMPARE_CHART_WORKERS", "0")
+    assert charts.chart_workers() == 0
+
+
+def test_pool_renders_the_same_charts(monkeypatch):
+    monkeypatch.setenv("MARKETCOMPARE_CHART_CACHE", "off")
+    specs = report_chart_specs(REPORT)
+    in_process = render_charts(specs)
+
+    monkeypatch.setenv("MARKETCOMPARE_CHART_WORKERS", "2")
+    pooled = render_charts(specs)
+    assert charts._pool is not None
+    assert pooled == in_process
+
+
+def test_cached_charts_are_not_rendered_again(monkeypatch):
+    specs = report_chart_specs(REPORT)
+    first = render_charts(specs)
+    monkeypatch.setattr(charts, "render_chart", lambda spec: pytest.fail("rendered a cached chart"))
+    assert render_charts(specs) == first
+
+    changed = report_chart_specs(dict(REPORT, swot_analysis={"strengths": ["a"]}))
+    monkeypatch.setattr(charts, "render_chart", lambda spec: b"new")
+    assert render_charts(changed)[0] == b"new"
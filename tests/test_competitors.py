@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta, UTC
+
+import pytest
+from crewai.tasks.task_output import TaskOutput
+
+from marketcompare.competitors import COLLECTION_NAME, CompetitorAnalysisTask, CompetitorStore, competitor_key
+from marketcompare.enhanced_models import CompetitorDetail, InitTaskOutput
+
+pytest.importorskip("mongomock")
+
+
+FIELDS = ("pricing", "discount_strategies", "product_features", "customer_satisfaction", "innovation_indicators")
+
+
+def _detail(content=None):
+    items = [{"content": content, "source": "example.com - Pricing"}] if content else []
+    return CompetitorDetail.model_validate({field: items for field in FIELDS})
+
+
+def _seconds_apart(first, second):
+    return abs((first.replace(tzinfo=None) - second.replace(tzinfo=None)).total_seconds())
+
+
+@pytest.fixture
+def store(mongo_db):
+    return CompetitorStore(mongo_db[COLLECTION_NAME], ttl=timedelta(hours=24))
+
+
+def test_competitor_key():
+    assert competitor_key("  TaskMaster   Pro ") == competitor_key("taskmaster pro")
+
+
+def test_fresh_respects_the_ttl(store):
+    store.save({"TaskMaster Pro": _detail("$10 per user")})
+    store.collection.insert_one({"_id": "old co", "name": "Old Co", "detail": _detail("$5").model_dump(),
+                                 "fetched_at": datetime.now(UTC) - timedelta(hours=25)})
+
+    fresh = store.fresh(["taskmaster  PRO", "Old Co", "Unknown"])
+    assert list(fresh) == ["taskmaster  PRO"]  # keyed by the requested spelling
+    assert fresh["taskmaster  PRO"].pricing[0].content == "$10 per user"
+
+
+def test_save_skips_placeholders(store):
+    saved = store.save({
+        "Researched": _detail("$10 per user"),
+        "Not found": _detail("DATA_NOT_FOUND: no public pricing"),
+        "Empty": _detail(),
+    })
+    assert saved == 1
+    assert [doc["_id"] for doc in store.collection.find()] == ["researched"]
+
+
+def _task_with_competitors(names):
+    init = CompetitorAnalysisTask(description="init", expected_output="init", name="init_task")
+    init.output = TaskOutput(description="init", agent="", raw="", pydantic=InitTaskOutput(
+        target_company="Acme", competitors=names, regions=[], key_metrics=[], task_assignments={}))
+    return CompetitorAnalysisTask(description="research", expected_output="report",
+                                  name="competitor_analysis_task", context=[init])
+
+
+def test_task_cache_is_only_used_without_the_store(store, monkeypatch):
+    task = _task_with_competitors(["TaskMaster Pro", "  ", "TaskMaster Pro"])
+    assert task.requested_competitors() == ["TaskMaster Pro"]
+
+    monkeypatch.setattr("marketcompare.competitors.get_competitor_store", lambda: store)
+    assert not task.use_task_cache()
+    assert _task_with_competitors([]).use_task_cache()
+    monkeypatch.setattr("marketcompare.competitors.get_competitor_store", lambda: None)
+    assert task.use_task_cache()
+
+
+def _run():
+    from marketcompare.main import run
+    from marketcompare.progress import RunProgress
+
+    report = run(progress=RunProgress(), save_files=False)
+    return report["run_metrics"]["tasks"]["competitor_analysis_task"]
+
+
+def test_fresh_competitors_skip_the_model(offline_pipeline):
+    from marketcompare.benchmark import SAMPLE_COMPETITORS
+
+    assert _run()["llm_calls"] >= 1
+    intelligence = offline_pipeline[COLLECTION_NAME]
+    first_fetch = {doc["_id"]: doc["fetched_at"] for doc in intelligence.find()}
+    assert set(first_fetch) == {competitor_key(name) for name in SAMPLE_COMPETITORS}
+
+    competitors = _run()
+    assert (competitors["llm_calls"], competitors["cached_output"]) == (0, True)
+    assert {doc["_id"]: doc["fetched_at"] for doc in intelligence.find()} == first_fetch
+
+
+def test_partial_research_keeps_the_stored_fetch_time(offline_pipeline):
+    intelligence = offline_pipeline[COLLECTION_NAME]
+    fetched_at = datetime.now(UTC) - timedelta(hours=3)
+    intelligence.insert_one({"_id": "competitor 1", "name": "Competitor 1",
+                             "detail": _detail("$9 per user").model_dump(), "fetched_at": fetched_at})
+
+    assert _run()["llm_calls"] >= 1
+
+    stored = {doc["_id"]: doc for doc in intelligence.find()}
+    # The fake agent repeats Competitor 1; only Competitor 2 was researched by this run
+    assert _seconds_apart(stored["competitor 1"]["fetched_at"], fetched_at) < 0.01
+    assert stored["competitor 1"]["detail"]["pricing"][0]["content"] == "$9 per user"
+    assert _seconds_apart(stored["competitor 2"]["fetched_at"], datetime.now(UTC)) < 60
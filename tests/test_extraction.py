@@ -0,0 +1,99 @@
+import json
+
+import pytest
+
+from marketcompare.enhanced_models import FinalReportOutput
+from marketcompare import extraction
+from marketcompare.extraction import ExtractionError, extract_report, find_json_object, parse_report_json
+
+REPORT = {
+    "swot_analysis": {"strengths": ["Margin"], "weaknesses": ["Reach"], "opportunities": ["EU"], "threats": ["Price war"]},
+    "pricing_comparison": {"our_pricing": [{"product_line": "ProjectFlow", "price_range": "$12-$24"}]},
+    "competitive_positioning": {"market_share": "4%"},
+    "market_analysis": {"market_growth": "11% CAGR"},
+    "recommendations": {"immediate_actions": ["Annual discount"]},
+}
+
+
+def test_find_json_object_skips_prose_and_fences():
+    text = f"Here is the report:\n```json\n{json.dumps(REPORT)}\n```\nLet me know!"
+    assert json.loads(find_json_object(text)) == REPORT
+
+
+def test_find_json_object_tries_later_braces():
+    assert parse_report_json('Sure {see below}\n{"a": 1}') == {"a": 1}
+
+
+def test_find_json_object_tries_braces_read_inside_strings():
+    assert parse_report_json('{ I don\'t know {"a": 1}') == {"a": 1}
+
+
+@pytest.mark.parametrize("noise", [
+    "{ " * 20000,
+    "see {placeholder} and { note " * 5000,
+    '{"k": {"k" ' * 5000,
+], ids=["opens", "prose", "keys"])
+def test_find_json_object_scans_stray_braces_once(monkeypatch, noise):
+    scans = []
+    scan = extraction._scan
+    monkeypatch.setattr(extraction, "_scan", lambda *args: scans.append(args[1]) or scan(*args))
+    assert json.loads(find_json_object(noise + json.dumps(REPORT))) == REPORT
+    assert len(scans) == 1
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"a": [1, 2,],}', {"a": [1, 2]}),
+    ('{"a": 1, // note\n "b": 2}', {"a": 1, "b": 2}),
+    ("{'a': 'it\\'s'}", {"a": "it's"}),
+    ('{“a”: “b”}', {"a": "b"}),
+    ('{"a": True, "b": None, "c": False}', {"a": True, "b": None, "c": False}),
+    ('{"a": "line one\nline two"}', {"a": "line one\nline two"}),
+    ('{"a": {"b": [1, 2', {"a": {"b": [1, 2]}}),
+    ('{"a": "cut', {"a": "cut"}),
+    ('{"a":', {"a": None}),
+])
+def test_find_json_object_repairs(text, expected):
+    assert parse_report_json(text) == expected
+
+
+def test_find_json_object_without_object():
+    assert find_json_object("no json here") is None
+    with pytest.raises(ExtractionError):
+        parse_report_json("no json here")
+
+
+def test_extract_report_validates_raw_output():
+    result = {"raw": "Final report:\n" + json.dumps(REPORT)}
+    assert extract_report(result, reask=None)["swot_analysis"] == REPORT["swot_analysis"]
+
+
+def test_extract_report_falls_back_to_structured_output():
+    structured = FinalReportOutput.model_validate(REPORT)
+    report = extract_report({"raw": "I could not finish.", "pydantic": structured}, reask=None)
+    assert report["market_analysis"] == REPORT["market_analysis"]
+
+
+def test_extract_report_reasks_once():
+    calls = []
+
+    def reask(raw, error):
+        calls.append((raw, error))
+        return json.dumps(REPORT)
+
+    report = extract_report({"raw": "SWOT: strong margins, weak reach"}, reask=reask)
+    assert report["recommendations"] == REPORT["recommendations"]
+    assert len(calls) == 1
+
+
+def test_extract_report_reask_can_be_disabled(monkeypatch):
+    monkeypatch.setenv("MARKETCOMPARE_EXTRACTION_REASK", "off")
+
+    def reask(raw, error):
+        raise AssertionError("re-ask must not run")
+
+    with pytest.raises(ExtractionError):
+        extract_report({"raw": "no report"}, reask=reask)
+
+
+def test_extract_report_keeps_off_schema_json():
+    assert extract_report({"raw": '{"summary": "short"}'}, reask=None) == {"summary": "short"}
@@ -0,0 +1,75 @@
+import pytest
+
+from marketcompare.llm import CachedLLM, _usage_tokens
+from marketcompare.progress import RunProgress
+
+
+@pytest.fixture(autouse=True)
+def offline(monkeypatch):
+    monkeypatch.setenv("MARKETCOMPARE_RATE_LIMIT", "off")
+    monkeypatch.setattr("marketcompare.llm._llm_cache", None)
+
+
+def _llm(**kwargs):
+    # litellm answers `mock_response` without a request, reporting a fixed usage
+    llm = CachedLLM(model="gpt-4o-mini", api_key="sk-test", **kwargs)
+    llm.progress = RunProgress()
+    return llm
+
+
+def _llm_calls(llm):
+    return [event for event in llm.progress.events if event["type"] == "llm_call"]
+
+
+MESSAGES = [{"role": "user", "content": "Summarise the market in one line."}]
+
+
+def test_usage_tokens():
+    assert _usage_tokens({"prompt_tokens": 12, "completion_tokens": 3}) == (12, 3)
+    assert _usage_tokens({"prompt_tokens": 12}) == (12, 0)
+    assert _usage_tokens({}) is None
+
+    class Usage:
+        prompt_tokens = 7
+        completion_tokens = 2
+
+    assert _usage_tokens(Usage()) == (7, 2)
+
+
+def test_completion_books_the_provider_usage(monkeypatch):
+    monkeypatch.setenv("MARKETCOMPARE_LLM_CACHE", "off")
+    llm = _llm(mock_response="The market grew 11%.")
+    assert llm.call(MESSAGES) == "The market grew 11%."
+
+    [event] = _llm_calls(llm)
+    assert event["estimated"] is False and event["cached"] is False
+    assert (event["prompt_tokens"], event["completion_tokens"]) == (10, 20)  # litellm's mock usage
+
+
+def test_cache_hits_are_estimated_not_billed():
+    llm = _llm(mock_response="The market grew 11%.")
+    llm.call(MESSAGES)
+    llm.call(MESSAGES)
+
+    miss, hit = _llm_calls(llm)
+    assert (miss["cached"], miss["estimated"]) == (False, False)
+    assert (hit["cached"], hit["estimated"]) == (True, True)
+    assert hit["completion_tokens"] > 0
+
+
+def test_completions_without_usage_are_estimated(monkeypatch):
+    monkeypatch.setenv("MARKETCOMPARE_LLM_CACHE", "off")
+
+    class NoUsageLLM(CachedLLM):
+        def _complete(self, messages, started, **kwargs):
+            return "Final Answer: done"
+
+    llm = NoUsageLLM(model="gpt-4o-mini", api_key="sk-test")
+    llm.progress = RunProgress()
+    # Usage left behind by an earlier call in this thread must not be booked again
+    _llm(mock_response="earlier").call(MESSAGES)
+    llm.call(MESSAGES)
+
+    [event] = _llm_calls(llm)
+    assert event["estimated"] is True
+    assert event["prompt_tokens"] > 0
@@ -0,0 +1,110 @@
+import sqlite3
+import zlib
+
+import numpy as np
+import pytest
+
+from marketcompare.page_index import PageIndex, normalize_url
+
+PRICING = "# Pricing\n\nPlans start at $10 per user per month.\n\n# Support\n\nSupport is available around the clock."
+
+
+class FakeWeb:
+    """Injectable fetch/embed pair that counts calls."""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.fetched = []
+        self.embedded = []
+
+    def fetch(self, url):
+        self.fetched.append(url)
+        return self.pages[url]
+
+    def embed(self, texts, model):
+        self.embedded.append((list(texts), model))
+        # Bag of words hashed into 64 dimensions (float64 on purpose: the index stores float32)
+        vectors = np.zeros((len(texts), 64))
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[row, zlib.crc32(word.strip(".,$?").encode()) % 64] += 1
+        return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1)
+
+
+@pytest.fixture
+def web():
+    return FakeWeb({"https://example.com/pricing": PRICING})
+
+
+def _index(tmp_path, web, **kwargs):
+    return PageIndex(tmp_path / "pages.sqlite3", fetch=web.fetch, embed=web.embed, **kwargs)
+
+
+def test_normalize_url():
+    assert normalize_url("Example.COM/Docs/") == "https://example.com/Docs"
+    assert normalize_url("HTTP://example.com/a?b=1#top") == "http://example.com/a?b=1"
+
+
+def test_search_returns_the_relevant_chunk(tmp_path, web):
+    index = _index(tmp_path, web, model="fake")
+    [best] = index.search("https://example.com/pricing", "support around the clock", top_k=1)
+    assert "Support" in best
+
+
+def test_fresh_pages_are_reused_without_fetching(tmp_path, web):
+    index = _index(tmp_path, web, model="fake")
+    index.ensure("https://example.com/pricing")
+    index.ensure("HTTPS://EXAMPLE.com/pricing/")
+    assert len(web.fetched) == 1
+    assert index.stats()["reused"] == 1
+
+
+def test_stale_pages_are_revalidated_and_only_reembedded_when_changed(tmp_path, web):
+    index = _index(tmp_path, web, model="fake", revalidate_seconds=0)
+    index.ensure("https://example.com/pricing")
+    index.ensure("https://example.com/pricing")
+    assert len(web.fetched) == 2
+    assert (index.stats()["revalidated"], len(web.embedded)) == (1, 1)
+
+    web.pages["https://example.com/pricing"] = PRICING.replace("$10", "$12")
+    index.ensure("https://example.com/pricing")
+    assert (index.stats()["embedded"], len(web.embedded)) == (2, 2)
+    assert "$12" in " ".join(index.search("https://example.com/pricing", "plans per user"))
+
+
+def test_pages_are_keyed_by_embedding_model(tmp_path, web):
+    _index(tmp_path, web, model="small").ensure("https://example.com/pricing")
+    large = _index(tmp_path, web, model="large")
+    large.ensure("https://example.com/pricing")
+    assert [model for _, model in web.embedded] == ["small", "large"]
+    assert large.stats()["pages"] == 2
+
+    # Switching back reuses the first model's vectors
+    _index(tmp_path, web, model="small").ensure("https://example.com/pricing")
+    assert len(web.embedded) == 2
+
+
+def test_least_recently_used_pages_are_evicted(tmp_path, web):
+    web.pages.update({"https://a.com": "alpha " * 50, "https://b.com": "beta " * 50})
+    index = _index(tmp_path, web, model="fake")
+    index.search("https://a.com", "alpha")
+    index.search("https://b.com", "beta")
+    index.max_bytes = index.stats()["bytes"]  # full
+    index.search("https://a.com", "alpha")   # b is now the least recently used
+    index.ensure("https://example.com/pricing")
+
+    with sqlite3.connect(tmp_path / "pages.sqlite3") as conn:
+        urls = {url for (url,) in conn.execute("SELECT url FROM pages")}
+    assert "https://b.com" not in urls
+    assert "https://example.com/pricing" in urls
+    assert index.stats()["bytes"] <= index.max_bytes
+
+
+def test_index_without_model_column_is_rebuilt(tmp_path, web):
+    with sqlite3.connect(tmp_path / "pages.sqlite3") as conn:
+        conn.execute("CREATE TABLE pages (url TEXT PRIMARY KEY, content_hash TEXT, size INTEGER,"
+                     " checked_at REAL, accessed_at REAL)")
+        conn.execute("INSERT INTO pages VALUES ('https://example.com/pricing', 'x', 1, 9e9, 9e9)")
+    index = _index(tmp_path, web, model="fake")
+    index.ensure("https://example.com/pricing")
+    assert web.fetched == ["https://example.com/pricing"]
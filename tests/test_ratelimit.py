@@ -0,0 +1,93 @@
+import threading
+import time
+
+import pytest
+
+from marketcompare import ratelimit
+from marketcompare.ratelimit import (
+    HIGH_PRIORITY, NORMAL_PRIORITY, FileBucket, LocalBucket, RateLimiter, configured_limits, llm_provider,
+    task_priority,
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_limiters(monkeypatch):
+    monkeypatch.setattr(ratelimit, "_limiters", {})
+
+
+def test_llm_provider():
+    assert llm_provider("gpt-4o-mini") == "openai"
+    assert llm_provider("anthropic/claude-3-haiku") == "anthropic"
+    assert llm_provider(None) == "openai"
+
+
+def test_configured_limits(monkeypatch):
+    monkeypatch.setenv("MARKETCOMPARE_RATE_LIMITS", "openai=120, Serper=5")
+    limits = configured_limits()
+    assert limits["openai"] == 120
+    assert limits["serper"] == 5
+    assert limits["website"] == ratelimit.DEFAULT_LIMITS["website"]
+
+
+def test_task_priority(monkeypatch):
+    monkeypatch.delenv("MARKETCOMPARE_RATE_LIMIT_PRIORITY_TASKS", raising=False)
+    assert task_priority("final_report_task") == HIGH_PRIORITY
+    assert task_priority("market_research_task") == NORMAL_PRIORITY
+    monkeypatch.setenv("MARKETCOMPARE_RATE_LIMIT_PRIORITY_TASKS", "market_research_task")
+    assert task_priority("market_research_task") == HIGH_PRIORITY
+    assert task_priority("final_report_task") == NORMAL_PRIORITY
+
+
+def test_local_bucket_burst_then_refill():
+    bucket = LocalBucket(rate_per_minute=600, burst=2)  # one token per 0.1 s
+    assert bucket.take() == 0
+    assert bucket.take() == 0
+    wait = bucket.take()
+    assert 0 < wait <= 0.1
+    time.sleep(wait + 0.01)
+    assert bucket.take() == 0
+
+
+def test_file_bucket_is_shared_through_its_file(tmp_path):
+    first = FileBucket(tmp_path / "openai.json", rate_per_minute=60, burst=1)
+    second = FileBucket(tmp_path / "openai.json", rate_per_minute=60, burst=1)
+    assert first.take() == 0
+    assert second.take() > 0
+
+
+def test_limiter_serves_high_priority_first():
+    bucket = LocalBucket(rate_per_minute=600, burst=1)
+    bucket.take()  # empty: every caller below has to queue
+    limiter = RateLimiter("test", bucket)
+    order = []
+
+    def call(name, priority, delay):
+        time.sleep(delay)
+        limiter.acquire(priority)
+        order.append(name)
+
+    threads = [
+        threading.Thread(target=call, args=("normal-1", NORMAL_PRIORITY, 0)),
+        threading.Thread(target=call, args=("normal-2", NORMAL_PRIORITY, 0.01)),
+        threading.Thread(target=call, args=("critical", HIGH_PRIORITY, 0.02)),
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    # normal-1 may already hold the head of the queue; critical overtakes normal-2
+    assert order.index("critical") < order.index("normal-2")
+    stats = limiter.stats()
+    assert stats["acquired"] == 3
+    assert stats["queued"] == 0
+    assert stats["wait_seconds"] > 0
+
+
+def test_get_limiter_respects_switch_and_limits(monkeypatch):
+    monkeypatch.setenv("MARKETCOMPARE_RATE_LIMIT", "off")
+    assert ratelimit.get_limiter("openai") is None
+    monkeypatch.setenv("MARKETCOMPARE_RATE_LIMIT", "on")
+    assert ratelimit.get_limiter("unknown-provider") is None
+    limiter = ratelimit.get_limiter("OpenAI")
+    assert limiter is ratelimit.get_limiter("openai")
+    assert 'provider="openai"' in ratelimit.render_prometheus()
@@ -0,0 +1,85 @@
+from marketcompare.financials import format_financial_context, parse_financial_statements, parse_statement
+from marketcompare.retrieval import BM25Index, build_task_contexts, chunk_document, document_title
+
+STATEMENT = """# Innovatech Solutions Ltd. - Income Statement
+## Revenue
+Subscription Revenue - ProjectFlow: $1,855,000
+Professional Services & Other: $79,500
+**Total Revenue: $1,934,500**
+
+## Gross Profit: $2,093,500
+*Gross Profit Margin: 79.0%*
+
+## Other
+Net Interest: ($12,000)
+Customers: 1,200
+
+## Notes
+Revenue grew 12%: a strong year.
+"""
+
+REPORT = """# Annual Report 2024
+## Market Overview
+The project management market grew 11% with strong mid-market demand.
+
+## Competitors
+Competitor A cut prices by 20% in Europe.
+
+## Product
+ProjectFlow added AI planning features.
+"""
+
+
+def test_parse_statement_line_items():
+    statement = parse_statement("Income Statement 2024", STATEMENT)
+    revenue = statement.find("Subscription Revenue - ProjectFlow")
+    assert (revenue.value, revenue.unit, revenue.section, revenue.line) == (1855000, "USD", "Revenue", 3)
+    assert statement.find("Total Revenue").is_total
+    gross = statement.find("Gross Profit")
+    assert gross.is_total and gross.value == 2093500
+    assert statement.find("Gross Profit Margin").unit == "%"
+    assert statement.find("Net Interest").value == -12000
+    assert statement.find("Customers").unit == "count"
+    # Notes are prose and skipped
+    assert all("Notes" not in item.section for item in statement.items)
+
+
+def test_financial_context_references_source_lines():
+    statements = parse_financial_statements({"income_statement_2024": STATEMENT, "balance_sheet_2024": ""})
+    assert [statement.title for statement in statements] == ["Income Statement 2024"]
+    context = format_financial_context(statements)
+    assert "Income Statement 2024 | Revenue: Subscription Revenue - ProjectFlow $1,855,000 [L3]" in context
+    assert "=Total Revenue $1,934,500 [L5]" in context
+    assert "($12,000)" in context
+
+
+def test_chunk_document_keeps_heading_paths():
+    passages = chunk_document("Annual Report 2024", REPORT)
+    assert [passage.section for passage in passages] == ["Market Overview", "Competitors", "Product"]
+    assert passages[1].label == "Annual Report 2024 - Competitors"
+    assert [passage.position for passage in passages] == [0, 1, 2]
+
+
+def test_chunk_document_bounds_passage_size():
+    text = "\n".join(f"Line {i} " + "x" * 100 for i in range(100))
+    passages = chunk_document("Doc", text, max_chars=500)
+    assert len(passages) > 1
+    assert all(len(passage.text) < 500 * 1.5 + 200 for passage in passages)
+
+
+def test_bm25_ranks_relevant_passage_first_and_keeps_every_source():
+    passages = chunk_document("Annual Report 2024", REPORT) + chunk_document("Roadmap", "## Plans\nHire sales staff.")
+    top = BM25Index(passages).top_k("competitor prices Europe", 2)
+    assert top[0].section == "Competitors"
+    assert {passage.source for passage in top} == {"Annual Report 2024", "Roadmap"}
+
+
+def test_build_task_contexts(monkeypatch):
+    monkeypatch.delenv("MARKETCOMPARE_RETRIEVAL_TOP_K", raising=False)
+    documents = {"annual_report_2024": REPORT, "income_statement_2024": STATEMENT}
+    contexts = build_task_contexts(documents, mode="bm25")
+    assert "[Annual Report 2024 - Competitors]" in contexts["market_research_context"]
+    assert "Subscription Revenue - ProjectFlow" in contexts["financial_figures"]
+    assert contexts["recommendation_context"] == ""
+    full = build_task_contexts(documents, mode="full")
+    assert full["market_research_context"] == f"[{document_title('annual_report_2024')}]\n{REPORT}"
@@ -0,0 +1,143 @@
+import io
+
+import pytest
+
+from marketcompare.routes import _etag_matches, _if_range_matches, _iter_range, _parse_range
+
+TEST_URI = "mongodb://routes-test.invalid/"
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-9", (0, 9)),
+    ("bytes=90-", (90, 99)),
+    ("bytes=-10", (90, 99)),
+    ("bytes=-500", (0, 99)),
+    ("bytes=50-500", (50, 99)),
+    (None, None),
+    ("bytes=-", None),
+    ("bytes=0-1,5-6", None),
+    ("items=0-9", None),
+])
+def test_parse_range(header, expected):
+    assert _parse_range(header, 100) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=100-", "bytes=150-200", "bytes=9-2", "bytes=-0"])
+def test_unsatisfiable_ranges(header):
+    with pytest.raises(ValueError):
+        _parse_range(header, 100)
+
+
+def test_etag_matches():
+    etag = '"abc"'
+    assert _etag_matches('"abc"', etag)
+    assert _etag_matches('W/"abc"', etag)
+    assert _etag_matches('"old", W/"abc"', etag)
+    assert _etag_matches(" * ", etag)
+    assert not _etag_matches('"abcd"', etag)
+    assert not _etag_matches(None, etag)
+
+
+def test_if_range_matches():
+    etag = '"abc"'
+    assert _if_range_matches(None, etag)
+    assert _if_range_matches('"abc"', etag)
+    assert not _if_range_matches('W/"abc"', etag)  # weak tags never match If-Range
+    assert not _if_range_matches("Wed, 21 Oct 2015 07:28:00 GMT", etag)
+
+
+class _Source(io.BytesIO):
+    def __init__(self, data):
+        super().__init__(data)
+        self.closed_by_iter = False
+
+    def close(self):
+        self.closed_by_iter = True
+        super().close()
+
+
+def test_iter_range_reads_in_chunks_and_closes(monkeypatch):
+    monkeypatch.setattr("marketcompare.routes.CHUNK_SIZE", 4)
+    source = _Source(bytes(range(20)))
+    chunks = list(_iter_range(source, 3, 10))
+    assert [len(chunk) for chunk in chunks] == [4, 4, 2]
+    assert b"".join(chunks) == bytes(range(3, 13))
+    assert source.closed_by_iter
+
+
+def test_iter_range_closes_an_abandoned_download():
+    source = _Source(b"x" * 100)
+    stream = _iter_range(source, 0, 100)
+    next(stream)
+    stream.close()
+    assert source.closed_by_iter
+
+
+@pytest.fixture
+def api(mongo_db, monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from marketcompare import artifacts, mongo
+    from marketcompare.routes import router
+
+    monkeypatch.setattr(artifacts, "_stores", {})
+    monkeypatch.setattr(mongo, "_clients", {TEST_URI: mongo_db.client})
+    monkeypatch.setenv("MONGODB_URI", TEST_URI)
+    monkeypatch.setenv("DB_NAME", mongo_db.name)
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+
+@pytest.fixture
+def stored_pdf(mongo_db):
+    from marketcompare.artifacts import ArtifactStore
+
+    data = b"%PDF-1.4 " + bytes(range(256)) * 2000
+    pdf_id, sha256, _ = ArtifactStore(mongo_db).put(data, "report.pdf", "application/pdf")
+    mongo_db["Market_Report"].insert_one({"report_id": "r1", "filename": "report.pdf",
+                                          "pdf_id": pdf_id, "pdf_sha256": sha256})
+    return data, f'"{sha256}"'
+
+
+def test_download_full_pdf(api, stored_pdf):
+    data, etag = stored_pdf
+    response = api.get("/reports/r1/pdf")
+    assert response.status_code == 200
+    assert response.content == data
+    assert response.headers["etag"] == etag
+    assert response.headers["content-length"] == str(len(data))
+
+
+def test_download_ranges(api, stored_pdf):
+    data, etag = stored_pdf
+    response = api.get("/reports/r1/pdf", headers={"Range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response.content == data[10:20]
+    assert response.headers["content-range"] == f"bytes 10-19/{len(data)}"
+
+    assert api.get("/reports/r1/pdf", headers={"Range": "bytes=-5"}).content == data[-5:]
+    assert api.get("/reports/r1/pdf", headers={"Range": f"bytes={len(data) - 3}-"}).content == data[-3:]
+
+    response = api.get("/reports/r1/pdf", headers={"Range": f"bytes={len(data)}-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(data)}"
+
+
+def test_conditional_requests(api, stored_pdf):
+    data, etag = stored_pdf
+    assert api.get("/reports/r1/pdf", headers={"If-None-Match": f'"other", {etag}'}).status_code == 304
+
+    resumed = api.get("/reports/r1/pdf", headers={"Range": "bytes=0-9", "If-Range": etag})
+    assert (resumed.status_code, resumed.content) == (206, data[:10])
+
+    stale = api.get("/reports/r1/pdf", headers={"Range": "bytes=0-9", "If-Range": '"old"'})
+    assert (stale.status_code, stale.content) == (200, data)
+
+
+def test_legacy_inline_pdf_and_unknown_report(api, mongo_db):
+    mongo_db["Market_Report"].insert_one({"report_id": "old", "pdf": b"%PDF-1.3 inline"})
+    response = api.get("/reports/old/pdf", headers={"Range": "bytes=0-7"})
+    assert (response.status_code, response.content) == (206, b"%PDF-1.3")
+    assert api.get("/reports/missing/pdf").status_code == 404
@@ -0,0 +1,51 @@
+import pytest
+from crewai import Task
+
+from marketcompare.scheduling import DAG_MODE, apply_dag_schedule, get_execution_mode, plan_task_levels
+
+
+def make_task(name, context=None):
+    return Task(name=name, description=f"{name} description", expected_output="text", context=context or [])
+
+
+@pytest.fixture
+def tasks():
+    init = make_task("init")
+    internal = make_task("internal", [init])
+    market = make_task("market", [init])
+    competitor = make_task("competitor", [init])
+    synthesis = make_task("synthesis", [internal, market, competitor])
+    recommendation = make_task("recommendation", [synthesis])
+    final = make_task("final", [synthesis, recommendation])
+    return [final, init, internal, market, competitor, synthesis, recommendation]
+
+
+def test_execution_mode(monkeypatch):
+    monkeypatch.delenv("MARKETCOMPARE_EXECUTION_MODE", raising=False)
+    assert get_execution_mode() == "hierarchical"
+    monkeypatch.setenv("MARKETCOMPARE_EXECUTION_MODE", " DAG ")
+    assert get_execution_mode() == DAG_MODE
+    monkeypatch.setenv("MARKETCOMPARE_EXECUTION_MODE", "parallel")
+    with pytest.raises(ValueError):
+        get_execution_mode()
+
+
+def test_plan_task_levels(tasks):
+    levels = [[task.name for task in level] for level in plan_task_levels(tasks)]
+    assert levels == [["init"], ["internal", "market", "competitor"], ["synthesis"], ["recommendation"], ["final"]]
+
+
+def test_apply_dag_schedule_fans_out_independent_tasks(tasks):
+    ordered = apply_dag_schedule(tasks)
+    assert [task.name for task in ordered] == [
+        "init", "internal", "market", "competitor", "synthesis", "recommendation", "final",
+    ]
+    assert {task.name for task in ordered if task.async_execution} == {"internal", "market", "competitor"}
+
+
+def test_plan_task_levels_rejects_cycles():
+    first = make_task("first")
+    second = make_task("second", [first])
+    first.context = [second]
+    with pytest.raises(ValueError, match="circular"):
+        plan_task_levels([first, second])
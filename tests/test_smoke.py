@@ -0,0 +1,52 @@
+"""End-to-end run of the crew on the offline benchmark fakes (fake LLM and search, mongomock)."""
+import sys
+
+import pytest
+
+pytest.importorskip("mongomock")
+
+
+def test_run_end_to_end(offline_pipeline, tmp_path):
+    from marketcompare.main import run
+    from marketcompare.progress import RunProgress
+
+    report = run(progress=RunProgress(), company_name="Acme Corp", save_files=False)
+
+    assert set(report["swot_analysis"]) == {"strengths", "weaknesses", "opportunities", "threats"}
+    assert report["company_name"] == "Acme Corp"
+    tasks = report["run_metrics"]["tasks"]
+    assert {"init_task", "market_research_task", "final_report_task"} <= set(tasks)
+    assert tasks["market_research_task"]["tool_calls"] >= 1
+
+    stored = offline_pipeline["Market_LLM_Output"].find_one({"company_name": "Acme Corp"})
+    assert stored is not None
+    assert stored["swot_analysis"] == report["swot_analysis"]
+    assert report["pdf_id"]
+    pdf_doc = offline_pipeline["Market_Report"].find_one({"report_id": str(stored["_id"])})
+    assert pdf_doc is not None
+    assert str(pdf_doc["pdf_id"]) == report["pdf_id"]
+    assert offline_pipeline["report_artifacts.files"].count_documents({}) == 1 + len(pdf_doc["chart_ids"])
+    # Batch-style runs leave the working directory alone
+    assert not list(tmp_path.iterdir())
+
+
+
+@pytest.mark.parametrize("entry_point, crew_method", [
+    ("train", "train"),
+    ("test", "test"),
+    ("test_crew_compilation", "kickoff"),
+])
+def test_entry_point_inputs_fill_every_template_variable(offline_pipeline, monkeypatch, entry_point, crew_method):
+    from crewai import Crew
+    from marketcompare import main
+
+    captured = {}
+
+    def capture(crew, *args, inputs=None, **kwargs):
+        crew._interpolate_inputs(inputs)  # raises on a missing template variable
+        captured["inputs"] = inputs
+
+    monkeypatch.setattr(Crew, crew_method, capture)
+    monkeypatch.setattr(sys, "argv", ["marketcompare", "1", "unused"])
+    getattr(main, entry_point)()
+    assert captured["inputs"]["company_name"] == main.DEFAULT_COMPANY_NAME
@@ -0,0 +1,89 @@
+import json
+
+import pytest
+
+from marketcompare import spans
+from marketcompare.spans import SpanRegistry, registry, set_spans_enabled, span, traced
+
+
+@pytest.fixture
+def logged(monkeypatch):
+    """Spans on; yields the span trees logged by top-level spans."""
+    trees = []
+    monkeypatch.setattr(spans.logger, "info", lambda line: trees.append(json.loads(line)["span"]))
+    set_spans_enabled(True)
+    registry.reset()
+    yield trees
+    set_spans_enabled(None)
+    registry.reset()
+
+
+def test_disabled_spans_record_nothing():
+    registry.reset()
+    set_spans_enabled(False)
+    try:
+        with span("run") as current:
+            current.set(ignored=True)
+    finally:
+        set_spans_enabled(None)
+    assert current is spans._NOOP
+    assert "run" not in registry.snapshot()
+
+
+def test_nested_spans_log_one_tree(logged):
+    with span("run", company="Acme"):
+        with span("run.crew") as crew:
+            crew.set(tasks=3)
+        with span("run.pdf"):
+            pass
+
+    [tree] = logged
+    assert tree["name"] == "run" and tree["attributes"] == {"company": "Acme"}
+    assert [child["name"] for child in tree["children"]] == ["run.crew", "run.pdf"]
+    assert tree["children"][0]["attributes"] == {"tasks": 3}
+    assert set(registry.snapshot()) == {"run", "run.crew", "run.pdf"}
+
+
+def test_span_closes_when_its_block_raises(logged):
+    with pytest.raises(KeyError):
+        with span("run"):
+            with span("run.extract_json"):
+                raise KeyError("swot_analysis")
+
+    [tree] = logged
+    assert tree["error"].startswith("KeyError")
+    assert tree["children"][0]["error"].startswith("KeyError")
+    # Nothing is left open: the next span is a new root
+    with span("next"):
+        pass
+    assert [tree["name"] for tree in logged] == ["run", "next"]
+
+
+def test_traced_times_every_call(logged):
+    @traced("work")
+    def work(x):
+        return x * 2
+
+    assert work(2) == 4
+    with pytest.raises(TypeError):
+        work(None)
+    assert registry.snapshot()["work"][0] == 2
+    assert "error" in logged[1]
+
+
+def test_end_is_idempotent(logged):
+    current = spans.start_span("manual")
+    current.end()
+    current.end(error="late")
+    assert len(logged) == 1 and "error" not in logged[0]
+
+
+def test_prometheus_buckets_are_cumulative():
+    histograms = SpanRegistry()
+    histograms.observe("run", 0.003)
+    histograms.observe("run", 0.2)
+    text = histograms.render_prometheus()
+    assert 'marketcompare_span_duration_seconds_bucket{span="run",le="0.005"} 1' in text
+    assert 'marketcompare_span_duration_seconds_bucket{span="run",le="0.25"} 2' in text
+    assert 'marketcompare_span_duration_seconds_bucket{span="run",le="+Inf"} 2' in text
+    assert 'marketcompare_span_duration_seconds_count{span="run"} 2' in text
@@ -0,0 +1,55 @@
+"""Reuse of stored task outputs across runs, on the offline benchmark fakes."""
+import pytest
+
+pytest.importorskip("mongomock")
+
+
+@pytest.fixture
+def task_cache_on(offline_pipeline, monkeypatch):
+    monkeypatch.setenv("MARKETCOMPARE_TASK_CACHE", "on")
+    monkeypatch.setattr("marketcompare.task_cache._task_cache", None)
+    return offline_pipeline
+
+
+def _run():
+    from marketcompare.main import run
+    from marketcompare.progress import RunProgress
+
+    metrics = run(progress=RunProgress(), save_files=False)["run_metrics"]
+    executed = {name for name, task in metrics["tasks"].items() if not task["cached_output"]}
+    return metrics["totals"]["llm_calls"], executed
+
+
+ALL_TASKS = {"init_task", "internal_data_task", "market_research_task", "competitor_analysis_task",
+             "data_synthesis_task", "recommendation_task", "final_report_task"}
+
+
+def test_unchanged_inputs_reuse_every_task(task_cache_on):
+    calls, executed = _run()
+    assert calls > 0 and executed == ALL_TASKS
+
+    calls, executed = _run()
+    assert (calls, executed) == (0, set())
+
+
+def test_changed_document_reruns_only_the_tasks_that_read_it(task_cache_on):
+    _run()
+    # The balance sheet only reaches the internal data and recommendation tasks (as parsed figures)
+    documents = task_cache_on["Market_LLM_Input"]
+    balance_sheet = documents.find_one({"originalFileName": "balance_sheet_2024.txt"})
+    changed = balance_sheet["content"].replace("Prepaid Expenses: $85,000", "Prepaid Expenses: $95,000")
+    assert changed != balance_sheet["content"]
+    documents.update_one({"_id": balance_sheet["_id"]}, {"$set": {"content": changed}})
+
+    calls, executed = _run()
+    # Downstream tasks see the same (fake) upstream outputs, so they stay reused
+    assert executed == {"internal_data_task", "recommendation_task"}
+    assert calls == 2
+
+
+def test_expired_output_reruns_only_that_task(task_cache_on, monkeypatch):
+    _run()
+    monkeypatch.setenv("MARKETCOMPARE_TASK_CACHE_TTL_HOURS_MARKET_RESEARCH_TASK", "0")
+
+    _, executed = _run()
+    assert executed == {"market_research_task"}
@@ -0,0 +1,94 @@
+import threading
+import time
+
+import pytest
+
+from marketcompare.cache import DiskCache
+from marketcompare.tool_cache import ToolCache, normalize_args
+
+
+@pytest.fixture
+def tool_cache(tmp_path):
+    return ToolCache(DiskCache(tmp_path / "tools.sqlite3"), ttl_seconds=3600)
+
+
+def test_normalize_args():
+    assert normalize_args({"search_query": "  Project   MANAGEMENT "}) == {"search_query": "project management"}
+    assert normalize_args({"website": "HTTPS://www.Example.com/"}) == {"website": "https://www.example.com"}
+    assert normalize_args({"website": "example.com/pricing/"}) == {"website": "https://example.com/pricing"}
+    assert normalize_args({"n": 3}) == {"n": 3}
+
+
+def test_url_paths_stay_case_sensitive():
+    assert normalize_args({"website": "https://X.com/Docs/A"}) != normalize_args({"website": "https://x.com/docs/a"})
+    assert normalize_args({"url": "https://X.com/Docs/A"}) == {"url": "https://x.com/Docs/A"}
+
+
+def test_hit_after_miss_with_equivalent_arguments(tool_cache):
+    calls = []
+    compute = lambda: calls.append(1) or "result"
+    assert tool_cache.call("search", {"search_query": "CRM tools"}, compute) == "result"
+    assert tool_cache.call("search", {"search_query": "crm  tools"}, compute) == "result"
+    assert len(calls) == 1
+    assert tool_cache.stats()["hits"] == 1
+
+
+def test_expired_results_are_recomputed(tmp_path):
+    cache = ToolCache(DiskCache(tmp_path / "tools.sqlite3"), ttl_seconds=0)
+    calls = []
+    cache.call("search", {"q": "x"}, lambda: calls.append(1) or "a")
+    time.sleep(0.01)
+    cache.call("search", {"q": "x"}, lambda: calls.append(1) or "b")
+    assert len(calls) == 2
+
+
+def test_failures_are_not_cached(tool_cache):
+    def fail():
+        raise RuntimeError("rate limited")
+
+    with pytest.raises(RuntimeError):
+        tool_cache.call("search", {"q": "x"}, fail)
+    assert tool_cache.call("search", {"q": "x"}, lambda: "ok") == "ok"
+
+
+def test_concurrent_identical_calls_are_single_flighted(tool_cache):
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "result"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(tool_cache.call("search", {"q": "x"}, slow)))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(tool_cache.call("search", {"q": "x"}, slow)))
+                 for _ in range(3)]
+    for thread in followers:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join(5)
+    assert results == ["result"] * 4
+    assert len(calls) == 1
+
+
+def test_new_leader_rechecks_the_store(tool_cache):
+    # Another caller stores the result between this call's first lookup and its computing
+    lookup = tool_cache._lookup
+    first = [True]
+
+    def racing_lookup(key):
+        if first.pop() if first else False:
+            ToolCache(tool_cache.store, ttl_seconds=3600).call("search", {"q": "x"}, lambda: "stored")
+            return None
+        return lookup(key)
+
+    tool_cache._lookup = racing_lookup
+    assert tool_cache.call("search", {"q": "x"}, lambda: pytest.fail("tool called twice")) == "stored"
+    assert tool_cache.stats()["misses"] == 0